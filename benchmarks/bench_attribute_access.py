@@ -0,0 +1,80 @@
+""" Micro-benchmark of attribute access on Parametrized objects, compared
+with the previous __getattribute__-based implementation and with a plain
+python object.
+
+Run with::
+
+    python benchmarks/bench_attribute_access.py
+
+"""
+import timeit
+
+from lightparam import Parametrized, Param
+
+
+class LegacyParametrized(object):
+    """ The attribute access path of lightparam <= 0.4.6
+    """
+
+    def __init__(self):
+        self.name = ""
+
+    def __getattribute__(self, item):
+        if isinstance(object.__getattribute__(self, item), Param):
+            return object.__getattribute__(self, item).value
+        else:
+            return object.__getattribute__(self, item)
+
+    def __setattr__(self, item, value):
+        if hasattr(self, item):
+            if isinstance(object.__getattribute__(self, item), Param):
+                if isinstance(value, Param):
+                    for name, attr in value.__dict__.items():
+                        object.__getattribute__(self, item).__setattr__(name, attr)
+                else:
+                    old_val = object.__getattribute__(self, item).value
+                    object.__getattribute__(self, item).value = value
+                    if old_val != value:
+                        object.__getattribute__(self, item).changed = True
+            else:
+                object.__setattr__(self, item, value)
+        else:
+            object.__setattr__(self, item, value)
+
+
+class Legacy(LegacyParametrized):
+    def __init__(self):
+        super().__init__()
+        self.x = Param(1.0)
+        self.attribute = 1.0
+
+
+class Current(Parametrized):
+    def __init__(self):
+        super().__init__()
+        self.x = Param(1.0)
+        self.attribute = 1.0
+
+
+class Plain(object):
+    def __init__(self):
+        self.name = ""
+        self.x = 1.0
+        self.attribute = 1.0
+
+
+def bench(number=1000000, repeat=5):
+    print(f"{'class':>10} {'param read':>14} {'attr read':>14} {'param write':>14}")
+    for cls in [Legacy, Current, Plain]:
+        obj = cls()
+        times = [
+            min(timeit.repeat(stmt, globals=dict(o=obj), number=number, repeat=repeat))
+            / number
+            * 1e9
+            for stmt in ["o.x", "o.attribute", "o.x = 2.0"]
+        ]
+        print(f"{cls.__name__:>10}" + "".join(f"{t:>12.1f}ns" for t in times))
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,61 @@
+""" Benchmark of the binary format of lightparam.binary against JSON encoding
+of the state dicts, on a synthetic tree with 10000 parameters (100 nodes
+with 100 parameters of mixed types each), for the full state and for a
+delta of 100 changes. The binary data is indexed by the schema of the tree,
+and the self-describing encoding with the paths is measured as well.
+
+Run with::
+
+    python benchmarks/bench_binary.py
+
+"""
+import json
+import timeit
+
+from lightparam import Parametrized, Param, ParameterTree
+from lightparam.binary import encode, decode, serialize_binary
+
+
+def make_tree(n_nodes=100, n_params=100):
+    tree = ParameterTree()
+    defaults = [1.0, 3, True, "text", (0.5, 1.5)]
+    for i_node in range(n_nodes):
+        node = Parametrized(name=f"group_{i_node % 10}/sub/node_{i_node}", tree=tree)
+        for i_param in range(n_params):
+            setattr(node, f"param_{i_param}", Param(defaults[i_param % 5]))
+    return tree
+
+
+def bench(number=10, repeat=5):
+    tree = make_tree()
+    version = tree.version
+    for node in list(tree.tracked.values()):
+        node.param_0 = 2.0
+    n_params = len(tree.serialize_flat())
+
+    for mode, since in [("full state", None), ("delta", version)]:
+        state = tree.serialize(since=since)
+        flat = tree.serialize_flat(since=since)
+        json_data = json.dumps(state)
+        binary_data = serialize_binary(tree, since=since)
+        paths_data = encode(flat)
+        print(f"{mode} of a tree with {n_params} parameters:")
+        print(f"{'json size':>17} {len(json_data.encode()):10d} bytes")
+        print(f"{'binary size':>17} {len(binary_data):10d} bytes")
+        print(f"{'with paths size':>17} {len(paths_data):10d} bytes")
+        for name, function in [
+            ("json encode", lambda: json.dumps(tree.serialize(since=since))),
+            ("binary encode", lambda: serialize_binary(tree, since=since)),
+            ("with paths encode", lambda: encode(tree.serialize_flat(since=since))),
+            ("json decode", lambda: json.loads(json_data)),
+            ("binary decode", lambda: decode(binary_data, tree)),
+            ("with paths decode", lambda: decode(paths_data)),
+        ]:
+            t = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+            print(f"{name:>17} {t * 1e3:10.3f} ms")
+        assert decode(binary_data, tree) == flat
+        assert decode(paths_data) == flat
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,56 @@
+""" Benchmark of the construction of many identical Parametrized objects
+(e.g. one per ROI), with 20 parameters each, declared in __init__ or as
+class attributes, measuring time and memory.
+
+For reference, lightparam 0.4.6 (the baseline before the parameter
+registry and the change tracking) takes about 2.2 MB for 500 objects with
+20 parameters declared in __init__, and the same time as now within the
+measurement noise.
+
+Run with::
+
+    python benchmarks/bench_construction.py
+
+"""
+import timeit
+import tracemalloc
+
+from lightparam import Parametrized, Param, ParameterTree
+
+
+class InitParams(Parametrized):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        for i in range(10):
+            setattr(self, f"float_{i}", Param(1.0, (0.0, 10.0)))
+            setattr(self, f"choice_{i}", Param("a", ["a", "b", "c"]))
+
+
+class ClassParams(Parametrized):
+    locals().update(
+        {f"float_{i}": Param(1.0, (0.0, 10.0)) for i in range(10)}
+    )
+    locals().update(
+        {f"choice_{i}": Param("a", ["a", "b", "c"]) for i in range(10)}
+    )
+
+
+def make(cls, n_objects=500):
+    tree = ParameterTree()
+    return [cls(name=f"roi_{i}", tree=tree) for i in range(n_objects)]
+
+
+def bench(number=5, repeat=5):
+    print("Constructing 500 objects with 20 parameters:")
+    for name, cls in [("in __init__", InitParams), ("class attributes", ClassParams)]:
+        t = min(timeit.repeat(lambda: make(cls), number=number, repeat=repeat))
+        tracemalloc.start()
+        objects = make(cls)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+        print(f"{name:>18} {t / number * 1e3:8.2f} ms {memory / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    bench()
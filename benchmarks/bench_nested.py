@@ -0,0 +1,87 @@
+""" Timing comparison of the nested dictionary utilities with their previous
+recursive / reduce-based implementations, on a wide and on a deep tree,
+and scaling of visit_dict with the depth of a single leaf.
+
+Run with::
+
+    python benchmarks/bench_nested.py
+
+"""
+import timeit
+from functools import reduce
+
+from lightparam import get_nested, set_nested, visit_dict
+
+
+def legacy_get_nested(d, path):
+    return reduce(lambda d, k: d.setdefault(k, {}), path, d)
+
+
+def legacy_set_nested(d, path, value):
+    legacy_get_nested(d, path[:-1])[path[-1]] = value
+
+
+def legacy_visit_dict(d, path=[]):
+    for k, v in d.items():
+        if not isinstance(v, dict):
+            yield path + [k], v
+        else:
+            yield from legacy_visit_dict(v, path + [k])
+
+
+def make_wide(n_branches=100, n_leaves=100):
+    return {
+        f"branch_{i}": {"sub": {f"leaf_{j}": j for j in range(n_leaves)}}
+        for i in range(n_branches)
+    }
+
+
+def make_deep(depth=500):
+    d = dict()
+    level = d
+    for i in range(depth):
+        level["leaf"] = i
+        level = level.setdefault(f"level_{i}", {})
+    return d
+
+
+def bench(number=20, repeat=5):
+    def timed(function):
+        return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+    for tree_name, d in [("wide", make_wide()), ("deep", make_deep())]:
+        paths = [list(path) for path, _ in visit_dict(d)]
+        print(f"{tree_name} tree, {len(paths)} leaves:")
+        for name, legacy, current in [
+            (
+                "visit_dict",
+                lambda: list(legacy_visit_dict(d)),
+                lambda: list(visit_dict(d)),
+            ),
+            (
+                "get_nested",
+                lambda: [legacy_get_nested(d, p) for p in paths],
+                lambda: [get_nested(d, p) for p in paths],
+            ),
+            (
+                "set_nested",
+                lambda: [legacy_set_nested(d, p, 0) for p in paths],
+                lambda: [set_nested(d, p, 0) for p in paths],
+            ),
+        ]:
+            t_legacy, t_current = timed(legacy), timed(current)
+            print(
+                f"{name:>12} legacy {t_legacy * 1e3:8.3f} ms, "
+                f"current {t_current * 1e3:8.3f} ms ({t_legacy / t_current:.1f}x)"
+            )
+
+    print("visit_dict of a single leaf:")
+    for depth in [2000, 4000, 8000, 16000]:
+        d = dict()
+        set_nested(d, [f"level_{i}" for i in range(depth)], 1)
+        t = timed(lambda: list(visit_dict(d)))
+        print(f"{'depth ' + str(depth):>12} current {t * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    bench()
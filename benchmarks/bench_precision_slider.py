@@ -0,0 +1,76 @@
+""" Per-event cost of the magnifier of the precision sliders: evaluation
+of f_amp/f_line, handling of a mouse move, and painting of the magnifier
+popup, with the guide lines cached or redrawn at every paint as before
+they were cached.
+
+The popup is rendered directly into a preallocated image, so that only
+the cost of painting is measured, without the allocation and conversion
+of QWidget.grab.
+
+Requires PyQt5, runs without a display. Run with::
+
+    python benchmarks/bench_precision_slider.py
+
+"""
+import os
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEvent, QPoint, Qt
+from PyQt5.QtGui import QImage, QMouseEvent
+from PyQt5.QtWidgets import QApplication
+
+from lightparam.gui.precisionslider import PrecisionSingleSlider
+
+
+def bench(number=200, repeat=5):
+    app = QApplication([])
+    slider = PrecisionSingleSlider(0.0, 1.0)
+    slider.resize(300, 50)
+    popup = slider.popup
+    h = slider.magnifier_height
+    popup.resize(h, h)
+    image = QImage(h, h, QImage.Format_ARGB32_Premultiplied)
+    ys = range(h)
+
+    def timed(function, n=number):
+        return min(timeit.repeat(function, number=n, repeat=repeat)) / n
+
+    print("Per event:")
+    for name, function in [
+        ("f_amp", lambda: slider.f_amp(120)),
+        ("f_line", lambda: slider.f_line(120)),
+    ]:
+        print(f"{name:>26} {timed(function, 100000) * 1e6:10.3f} us")
+
+    for name, function in [
+        ("f_line per row", lambda: [slider.f_line(y) for y in ys]),
+        ("f_line_array", lambda: slider.f_line_array(ys)),
+    ]:
+        print(f"{name:>26} {timed(function) * 1e6:10.3f} us")
+
+    slider.mouse_status = 1
+    move = QMouseEvent(
+        QEvent.MouseMove, QPoint(170, 80), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier
+    )
+
+    def paint():
+        image.fill(Qt.transparent)
+        popup.render(image)
+
+    def paint_uncached():
+        popup.invalidate_guides()
+        paint()
+
+    for name, function in [
+        ("mouse move", lambda: slider.mouseMoveEvent(move)),
+        ("popup paint", paint),
+        ("popup paint, no cache", paint_uncached),
+    ]:
+        print(f"{name:>26} {timed(function) * 1e6:10.3f} us")
+    app.quit()
+
+
+if __name__ == "__main__":
+    bench()
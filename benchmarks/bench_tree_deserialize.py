@@ -0,0 +1,71 @@
+""" Benchmark of ParameterTree.deserialize on a synthetic tree with 10000
+parameters (100 nodes with 100 parameters each), compared with the previous
+implementation based on visit_dict and joined paths.
+
+Run with::
+
+    python benchmarks/bench_tree_deserialize.py
+
+"""
+import timeit
+import warnings
+
+from lightparam import Parametrized, Param, ParameterTree
+
+
+def legacy_visit_dict(d, path=[]):
+    for k, v in d.items():
+        if not isinstance(v, dict):
+            yield path + [k], v
+        else:
+            yield from legacy_visit_dict(v, path + [k])
+
+
+def legacy_deserialize(tree, restore_dict):
+    """ ParameterTree.deserialize of lightparam <= 0.4.6
+    """
+    for k, val in legacy_visit_dict(restore_dict):
+        try:
+            current = tree.tracked["/".join(k[:-1])]
+            loadable = current.params.items()[k[-1]].loadable
+            if not loadable or k[-1] == "loadable":
+                continue
+            try:
+                tree.tracked["/".join(k[:-1])].block_signal = True
+            except AttributeError:
+                pass
+            setattr(tree.tracked["/".join(k[:-1])], k[-1], val)
+            try:
+                tree.tracked["/".join(k[:-1])].block_signal = False
+            except AttributeError:
+                pass
+        except KeyError:
+            warnings.warn(
+                f"Trying to restore {k}, but it is not present in the parameter tree"
+            )
+
+
+def make_tree(n_nodes=100, n_params=100):
+    tree = ParameterTree()
+    for i_node in range(n_nodes):
+        node = Parametrized(name=f"group_{i_node % 10}/sub/node_{i_node}", tree=tree)
+        for i_param in range(n_params):
+            setattr(node, f"param_{i_param}", Param(float(i_param)))
+    return tree
+
+
+def bench(number=10, repeat=5):
+    tree = make_tree()
+    state = tree.serialize()
+    n_params = sum(len(node.params) for node in tree.tracked.values())
+    print(f"Restoring a tree with {n_params} parameters:")
+    for name, function in [
+        ("legacy", lambda: legacy_deserialize(tree, state)),
+        ("current", lambda: tree.deserialize(state)),
+    ]:
+        t = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+        print(f"{name:>10} {t * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    bench()
@@ -2,4 +2,5 @@ __version__ = "0.4.6"
 __author__ = "Vilim Stich, Luigi Petrucco",
 
 from lightparam.core import Param, ParamContainer, ParameterTree, \
-    Parametrized, get_nested, set_nested, visit_dict
\ No newline at end of file
+    Parametrized, TreeSnapshot, ValidationError, get_nested, set_nested, \
+    visit_dict
@@ -0,0 +1,363 @@
+""" Compact binary format for the state of a ParameterTree
+
+The format stores the state in the flat format of
+ParameterTree.serialize_flat, as:
+
+- a header with a magic number, the mode (full state or delta), the version
+  of the tree, the sizes of the following sections and the fingerprint of
+  the schema of the tree
+- a type code for each parameter
+- the keys of the parameters: either the indices of the parameters in the
+  schema of the tree (the list of the paths of all its parameters), or
+  nothing for full states, which have all the parameters in the order of
+  the schema. Data produced by encode, without a tree, has the paths of
+  the parameters instead, grouped by node
+- the values of fixed size (booleans, integers, floats and ranges), packed
+  together
+- the values of any other type (e.g. strings), as a JSON array
+
+Data with indices can only be decoded with a tree with the same schema,
+which is checked with the fingerprint.
+
+The values are grouped by type in the data, so that they can be packed and
+unpacked in bulk. The layouts computed from the schemas are cached, which
+makes repeated encoding and decoding of the state of a same tree cheaper.
+
+Unlike encoding the state dict as JSON, ranges are read back as tuples.
+
+Example::
+
+    data = serialize_binary(tree)
+    version = tree.version
+    ...
+    delta = serialize_binary(tree, since=version)
+    deserialize_binary(other_tree, data)
+    deserialize_binary(other_tree, delta)
+
+"""
+
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import chain
+import json
+from operator import itemgetter
+from struct import Struct, error as struct_error
+from weakref import WeakKeyDictionary
+
+MAGIC = b"LPRB"
+
+# magic, flags, tree version, number of parameters, length of the keys,
+# length of the JSON values, fingerprint of the schema
+_header = Struct("<4sBQIII8s")
+_DELTA = 1
+# keys given as indices in the schema of the tree:
+_INDEXED = 2
+_NO_FINGERPRINT = bytes(8)
+
+_INT_MIN = -(2 ** 63)
+_INT_MAX = 2 ** 63 - 1
+
+# struct formats of the scalar and pair values of each type code:
+_scalar_formats = {b"?"[0]: "?", b"q"[0]: "q", b"d"[0]: "d"}
+_pair_formats = {b"r"[0]: "dd", b"i"[0]: "qq"}
+
+_type_codes = {bool: b"?", int: b"q", float: b"d"}
+# codes of the types which do not depend on the value, integers are assumed
+# to fit in 64 bits:
+_fast_codes = {bool: b"?"[0], int: b"q"[0], float: b"d"[0], str: b"j"[0]}
+
+
+def _is_int(value):
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and _INT_MIN <= value <= _INT_MAX
+    )
+
+
+def value_code(value):
+    """ Type code of a value in the binary format: ? for booleans, q for
+    integers, d for floats, r for ranges of floats, i for ranges of integers
+    and j for the values stored as JSON.
+    """
+    code = _type_codes.get(type(value))
+    if code == b"q":
+        return code if _INT_MIN <= value <= _INT_MAX else b"j"
+    if code is not None:
+        return code
+
+    if isinstance(value, tuple) and len(value) == 2:
+        if all(type(v) is float for v in value):
+            return b"r"
+        if all(_is_int(v) for v in value):
+            return b"i"
+        return b"j"
+    # subclasses of the basic types, e.g. IntEnum
+    if isinstance(value, bool):
+        return b"?"
+    if _is_int(value):
+        return b"q"
+    if isinstance(value, float):
+        return b"d"
+    return b"j"
+
+
+def _getter(indices):
+    """ Function returning the items at the given indices of a sequence,
+    as a tuple.
+    """
+    if len(indices) == 0:
+        return lambda sequence: ()
+    if len(indices) == 1:
+        i = indices[0]
+        return lambda sequence: (sequence[i],)
+    return itemgetter(*indices)
+
+
+class _Layout:
+    """ Positions of the values of each kind in the data, for a schema
+    """
+
+    def __init__(self, codes):
+        scalars = [i for i, c in enumerate(codes) if c in _scalar_formats]
+        pairs = [i for i, c in enumerate(codes) if c in _pair_formats]
+        others = [
+            i
+            for i, c in enumerate(codes)
+            if c not in _scalar_formats and c not in _pair_formats
+        ]
+        self.n_scalars = len(scalars)
+        self.fixed = Struct(
+            "<"
+            + "".join(_scalar_formats[codes[i]] for i in scalars)
+            + "".join(_pair_formats[codes[i]] for i in pairs)
+        )
+        self.scalars = _getter(scalars)
+        self.pairs = _getter(pairs)
+        self.others = _getter(others)
+
+
+_layout = lru_cache(maxsize=32)(_Layout)
+
+
+@lru_cache(maxsize=32)
+def _encode_paths(keys):
+    """ Paths grouped by node, with each node name written once followed by
+    the names of its parameters, and the order of the keys in the groups
+    (None if it is unchanged).
+    """
+    groups = dict()
+    for i, key in enumerate(keys):
+        node, name = key.rsplit("/", 1)
+        groups.setdefault(node, []).append((i, name))
+
+    order = [i for entries in groups.values() for i, _ in entries]
+    paths = "\1".join(
+        "\0".join([node] + [name for _, name in entries])
+        for node, entries in groups.items()
+    )
+    if order == list(range(len(keys))):
+        return paths.encode(), None
+    return paths.encode(), _getter(order)
+
+
+def _value_codes(values, check_ints=False):
+    """ Type codes of a sequence of values, see value_code
+    """
+    if check_ints:
+        return b"".join(map(value_code, values))
+    codes = [_fast_codes.get(t) for t in map(type, values)]
+    if None in codes:
+        codes = [
+            c if c is not None else value_code(v)[0] for c, v in zip(codes, values)
+        ]
+    return bytes(codes)
+
+
+@lru_cache(maxsize=32)
+def _decode_paths(paths):
+    keys = []
+    for group in paths.decode().split("\1"):
+        node, *names = group.split("\0")
+        keys.extend(node + "/" + name for name in names)
+    return tuple(keys)
+
+
+class _TreeSchema:
+    """ Paths of all the parameters of a tree, in the order of
+    tree.serialize_flat(), with their indices and a fingerprint
+    """
+
+    def __init__(self, tree):
+        self.schema_version = tree._schema_version
+        keys = tuple(tree._flat_index.keys())
+        self.keys = keys
+        self.indices = {key: i for i, key in enumerate(keys)}
+        self.fingerprint = blake2b(
+            "\0".join(keys).encode(), digest_size=8
+        ).digest()
+
+
+_schemas = WeakKeyDictionary()
+
+
+def _tree_schema(tree):
+    schema = _schemas.get(tree)
+    if schema is None or schema.schema_version != tree._schema_version:
+        schema = _TreeSchema(tree)
+        _schemas[tree] = schema
+    return schema
+
+
+def _encode_values(values, keys_data, flags, version, fingerprint):
+    codes = _value_codes(values)
+    layout = _layout(codes)
+    try:
+        fixed = layout.fixed.pack(
+            *layout.scalars(values), *chain.from_iterable(layout.pairs(values))
+        )
+    except struct_error:
+        # integers too large for 64 bits are stored as JSON
+        codes = _value_codes(values, check_ints=True)
+        layout = _layout(codes)
+        fixed = layout.fixed.pack(
+            *layout.scalars(values), *chain.from_iterable(layout.pairs(values))
+        )
+    others = json.dumps(layout.others(values)).encode()
+
+    return b"".join(
+        [
+            _header.pack(
+                MAGIC,
+                flags,
+                version,
+                len(codes),
+                len(keys_data),
+                len(others),
+                fingerprint,
+            ),
+            codes,
+            keys_data,
+            fixed,
+            others,
+        ]
+    )
+
+
+def encode(values, version=0, delta=False):
+    """ Encode a flat state dict, with the paths of the parameters, so that
+    it can be decoded without a tree
+
+    :param values: flat dictionary of parameter paths and values
+    :param version: version of the tree to store in the header
+    :param delta: whether the values are only the changes since a
+        previous state
+    :return: bytes
+    """
+    paths, order = _encode_paths(tuple(values.keys()))
+    values = tuple(values.values())
+    if order is not None:
+        values = order(values)
+    flags = _DELTA if delta else 0
+    return _encode_values(values, paths, flags, version, _NO_FINGERPRINT)
+
+
+def decode_header(data):
+    """ Header of encoded data
+
+    :return: tuple of the tree version and whether the data is a delta
+    """
+    magic, flags, version, *_ = _header.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("The data is not in the lightparam binary format")
+    return version, bool(flags & _DELTA)
+
+
+def decode(data, tree=None):
+    """ Decode data produced by encode or serialize_binary
+
+    :param data: bytes-like object
+    :param tree: the ParameterTree, required for data produced by
+        serialize_binary, whose schema should match the one of the tree
+        the data comes from
+    :return: flat dictionary of parameter paths and values
+    """
+    (
+        magic,
+        flags,
+        _,
+        n,
+        keys_length,
+        others_length,
+        fingerprint,
+    ) = _header.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("The data is not in the lightparam binary format")
+
+    offset = _header.size
+    codes = bytes(data[offset : offset + n])
+    offset += n
+    if flags & _INDEXED:
+        if tree is None:
+            raise ValueError("The tree is required to decode the data")
+        schema = _tree_schema(tree)
+        if fingerprint != schema.fingerprint:
+            raise ValueError(
+                "The data does not come from a tree with the same parameters"
+            )
+        if keys_length == 0:
+            keys = schema.keys
+        else:
+            indices = Struct(f"<{n}I").unpack_from(data, offset)
+            keys = _getter(indices)(schema.keys)
+    elif n == 0:
+        return dict()
+    else:
+        keys = _decode_paths(bytes(data[offset : offset + keys_length]))
+    offset += keys_length
+
+    layout = _layout(codes)
+    fixed = layout.fixed.unpack_from(data, offset)
+    offset += layout.fixed.size
+    others = json.loads(bytes(data[offset : offset + others_length]))
+
+    values = dict(zip(layout.scalars(keys), fixed))
+    pair_values = iter(fixed[layout.n_scalars :])
+    values.update(zip(layout.pairs(keys), zip(pair_values, pair_values)))
+    values.update(zip(layout.others(keys), others))
+    return values
+
+
+def serialize_binary(tree, since=None):
+    """ Encode the state of a tree. The parameters are identified by their
+    position in the schema of the tree, so the data can only be decoded
+    with a tree with the same parameters (see deserialize_binary).
+
+    :param tree: the ParameterTree
+    :param since: (optional) a previous version of the tree, to encode only
+        the parameters changed afterwards, as in serialize_flat
+    :return: bytes
+    """
+    schema = _tree_schema(tree)
+    flat = tree.serialize_flat(since=since)
+    if since is None:
+        keys_data = b""
+        flags = _INDEXED
+    else:
+        keys_data = Struct(f"<{len(flat)}I").pack(
+            *map(schema.indices.__getitem__, flat)
+        )
+        flags = _INDEXED | _DELTA
+    return _encode_values(
+        tuple(flat.values()), keys_data, flags, tree.version, schema.fingerprint
+    )
+
+
+def deserialize_binary(tree, data):
+    """ Restore the state of a tree from data produced by serialize_binary,
+    either a full state or a delta, or by encode.
+
+    :param tree: the ParameterTree
+    :param data: bytes-like object
+    """
+    tree.deserialize_flat(decode(data, tree))
@@ -1,5 +1,10 @@
-from functools import reduce
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import copy
+from itertools import islice
+from types import MappingProxyType
 from .param_traits import HasTraitsLinked
+from threading import RLock
 import warnings
 
 
@@ -30,7 +35,14 @@ def get_nested(d, path):
     :param path: list of keys forming the path to the required entry;
     :return: entry from addressed path.
         """
-    return reduce(lambda d, k: d.setdefault(k, {}), path, d)
+    for k in path:
+        try:
+            d = d[k]
+        except KeyError:
+            new_d = dict()
+            d[k] = new_d
+            d = new_d
+    return d
 
 
 def set_nested(d, path, value):
@@ -52,78 +64,206 @@ def set_nested(d, path, value):
     :param path: list of keys forming the path to the required entry;
     :param value: value to be set;
     """
-    get_nested(d, path[:-1])[path[-1]] = value
+    last = len(path) - 1
+    for i, k in enumerate(path):
+        if i == last:
+            d[k] = value
+            return
+        try:
+            d = d[k]
+        except KeyError:
+            new_d = dict()
+            d[k] = new_d
+            d = new_d
 
 
-def visit_dict(d, path=[]):
-    for k, v in d.items():
-        if not isinstance(v, dict):
-            yield path + [k], v
+def visit_dict(d, path=()):
+    """
+    Iterate over all the leaves of a nested dictionary, depth-first. The
+    traversal is iterative, so there are no limits to the depth of the
+    dictionary.
+
+    Example::
+
+        >>> d = dict(a=dict(a0=0, a1=1), b=2)
+        >>> list(visit_dict(d))
+        [(('a', 'a0'), 0), (('a', 'a1'), 1), (('b',), 2)]
+
+    :param d: nested dictionary to visit;
+    :param path: (optional) keys to prepend to all the paths;
+    :return: generator of (path, value) pairs, with the paths as tuples of keys.
+    """
+    # The keys of the current branch are kept in a single list, so that the
+    # cost of going one level deeper does not grow with the depth:
+    keys = list(path)
+    to_visit = [iter(d.items())]
+    while to_visit:
+        for k, v in to_visit[-1]:
+            keys.append(k)
+            if isinstance(v, dict):
+                to_visit.append(iter(v.items()))
+                break
+            yield tuple(keys), v
+            keys.pop()
         else:
-            yield from visit_dict(v, path + [k])
+            to_visit.pop()
+            if to_visit:
+                keys.pop()
+
+
+class ValidationError(ValueError):
+    """ Error raised for parameter values outside of their limits, listing
+    all the values which are not valid.
+
+    :param violations: list of (key, value, reason) tuples
+    """
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__(
+            "Invalid parameter values:\n"
+            + "\n".join(
+                f"    {key}: {value!r} {reason}" for key, value, reason in violations
+            )
+        )
+
+
+class _NoLock:
+    """ Stand-in for the lock of parametrized objects which are not
+    thread-safe.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_no_lock = _NoLock()
 
 
 class IterParamContainer:
     def __init__(self, param_container):
-        self._params = param_container.items()
-        self._keys = list(self._params)
-        self._index = 0
+        self._items = iter(param_container.parametrized._params.items())
+
+    def __iter__(self):
+        return self
 
     def __next__(self):
-        if self._index < len(self._keys):
-            k = self._keys[self._index]
-            par = self._params[k]
+        return next(self._items)
 
-            self._index += 1
-            return k, par
 
-        raise StopIteration
+class ParamContainer(object):
+    """ Access to the Param objects of a Parametrized.
 
+    The parameters are kept in a registry which is updated whenever a Param
+    is assigned to the parametrized object, so no scanning of the object
+    attributes is required.
+    """
 
-class ParamContainer(object):
     def __init__(self, p):
         self.parametrized = p
 
     def items(self):
-        return {
-            name: param
-            for name, param in self.parametrized.__dict__.items()
-            if isinstance(param, Param)
-        }
+        """ Read-only view of the name: Param mapping. It is not a copy and
+        reflects later additions of parameters.
+        """
+        return MappingProxyType(self.parametrized._params)
+
+    def keys(self):
+        return self.parametrized._params.keys()
 
     @property
     def values(self):
-        return {
-            name: param.value
-            for name, param in self.parametrized.__dict__.items()
-            if isinstance(param, Param)
-        }
+        with self.parametrized._locked():
+            return {
+                name: param.value for name, param in self.parametrized._params.items()
+            }
+
+    def snapshot(self):
+        """ Read-only mapping of the current parameter values. The same
+        mapping is returned until a parameter is set, so reading it is cheap
+        and does not require locking, and for thread-safe parametrized
+        objects its values are always consistent with each other.
+        """
+        snapshot = self.parametrized._snapshot
+        if snapshot is None:
+            with self.parametrized._locked():
+                snapshot = MappingProxyType(
+                    {name: param.value for name, param in self.parametrized._params.items()}
+                )
+                object.__setattr__(self.parametrized, "_snapshot", snapshot)
+        return snapshot
 
     def changed_values(self):
-        return {
-            name: param.value
-            for name, param in self.parametrized.__dict__.items()
-            if isinstance(param, Param) and param.changed
-        }
+        """ Values of the parameters changed since the last acknowledgement.
+        Only the changed parameters are visited.
+        """
+        params = self.parametrized._params
+        with self.parametrized._locked():
+            return {name: params[name].value for name in self.parametrized._dirty}
 
     def acknowledge_changes(self):
-        for name, param in self.parametrized.__dict__.items():
-            if isinstance(param, Param):
-                param.changed = False
+        params = self.parametrized._params
+        with self.parametrized._locked():
+            for name in list(self.parametrized._dirty):
+                params[name].changed = False
+
+    def pop_changed_values(self):
+        """ Return the values of the changed parameters and acknowledge
+        the changes at once, so that no change made in between by another
+        thread is lost.
+        """
+        with self.parametrized._locked():
+            changed = self.changed_values()
+            self.acknowledge_changes()
+        return changed
 
     @values.setter
     def values(self, new_values):
-        for key, val in new_values.items():
-            self.parametrized.__dict__[key].value = val
+        self.update(new_values)
+
+    @contextmanager
+    def batch(self):
+        """ Context manager grouping the parameter changes made inside it,
+        so that parametrized objects which notify changes (e.g.
+        ParametrizedQt) do it only once at the end, with all the changes.
+        """
+        with self.parametrized._locked():
+            self.parametrized._begin_batch()
+            try:
+                yield self
+            finally:
+                self.parametrized._end_batch()
+
+    def update(self, new_values):
+        """ Set the values of several parameters, marking them as changed,
+        as a single batch (see batch).
+
+        :param new_values: dictionary of parameter names and values
+        """
+        for key in new_values.keys():
+            if key not in self.parametrized._params:
+                raise KeyError(key)
+        with self.batch():
+            for key, val in new_values.items():
+                setattr(self.parametrized, key, val)
 
     def __getattr__(self, item):
-        if item in self.parametrized.__dict__.keys():
-            return self.parametrized.__dict__[item]
-        else:
-            raise AttributeError
+        try:
+            return self.parametrized._params[item]
+        except KeyError:
+            raise AttributeError(item)
 
     def __getitem__(self, item):
-        return self.parametrized.__dict__[item]
+        return self.parametrized._params[item]
+
+    def __contains__(self, item):
+        return item in self.parametrized._params
+
+    def __len__(self):
+        return len(self.parametrized._params)
 
     def __iter__(self):
         """Returns the Iterator object"""
@@ -131,16 +271,81 @@ class ParamContainer(object):
 
 
 class Parametrized(object):
-    def __init__(self, name="", tree=None, params=None):
+    """ An object with parameters. The parameters can be declared as class
+    attributes, e.g.::
+
+        class Camera(Parametrized):
+            exposure = Param(1.0, (0.1, 10.0))
+
+    in which case they are collected once per class, and each instance gets
+    a copy of them without running Param.__init__ again, or assigned to the
+    instance (e.g. in __init__) as self.exposure = Param(1.0).
+    """
+
+    # Params declared as class attributes, as (name, Param) pairs:
+    _schema = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        schema = dict()
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Param):
+                    schema[name] = value
+        cls._schema = tuple(schema.items())
+
+    def __init__(
+        self, name="", tree=None, params=None, thread_safe=False, enforce_limits=None
+    ):
         """ Creates a parameterized class
 
         :param name: name, with optional path separated by slashes
         :param tree: a parameter-storing tree
         :param params: (optional) a dictionary of params
+        :param thread_safe: if True, parameters can be set from several
+            threads: writes are serialized with a lock, and params.snapshot()
+            gives consistent values without locking
+        :param enforce_limits: (optional) "raise" to raise a ValidationError
+            when a parameter is set to a value outside of its limits, or
+            "clamp" to bring numbers within the limits instead (see
+            Param.validate)
         """
+        # params assigned before this method was called:
+        pending = [
+            (key, value)
+            for key, value in self.__dict__.items()
+            if isinstance(value, Param)
+        ]
         super().__init__()
+        if enforce_limits not in (None, "raise", "clamp"):
+            raise ValueError(
+                f"enforce_limits should be None, 'raise' or 'clamp', not {enforce_limits!r}"
+            )
+        object.__setattr__(self, "_enforce_limits", enforce_limits)
+        object.__setattr__(self, "_lock", RLock() if thread_safe else None)
+        object.__setattr__(self, "_snapshot", None)
+        object.__setattr__(self, "_params", dict())
+        # names of the parameters changed since the last acknowledgement:
+        # (a dict used as an ordered set, which takes less memory than a set)
+        object.__setattr__(self, "_dirty", dict())
+        # trees the object has been added to:
+        object.__setattr__(self, "_trees", [])
         self.name = name
 
+        # Copy the params declared in the class, which are all new and
+        # therefore changed:
+        for key, template in self._schema:
+            param = template.__copy__()
+            param.parametrized = self
+            param.name = key
+            param._changed = True
+            self._params[key] = param
+            object.__setattr__(self, key, param._value)
+            self._dirty[key] = None
+
+        for key, value in pending:
+            setattr(self, key, value)
+
         # If there are params:
         if params is not None:
             # If params is actually a function with params annotations,
@@ -159,47 +364,131 @@ class Parametrized(object):
         if tree is not None:
             tree.add(self)
 
-    def __getattribute__(self, item):
-        # If parameter is asked, return its value:
-        if isinstance(object.__getattribute__(self, item), Param):
-            return object.__getattribute__(self, item).value
-        else:
-            return object.__getattribute__(self, item)
-
     def __setattr__(self, item, value):
-        # If there is already an attribute by that name:
-        if hasattr(self, item):
-
-            # If it is a parameter:
-            if isinstance(object.__getattribute__(self, item), Param):
-
-                # If we are replacing with a new parameter:
-                if isinstance(value, Param):
-                    # If we are over-writing a param with a param, replace all
-                    # its properties:
-                    for name, attr in value.__dict__.items():
-                        object.__getattribute__(self, item).__setattr__(name, attr)
+        # Parameter values are mirrored in the instance __dict__ (see
+        # Param.value), so reading them is a plain attribute lookup and only
+        # assignments need to go through here.
+        try:
+            param = self._params.get(item)
+        except AttributeError:
+            # The parameter registry has not been created yet (assignment
+            # before Parametrized.__init__): keep params in the instance
+            # __dict__, __init__ registers them
+            pending = self.__dict__.get(item)
+            if isinstance(pending, Param) and not isinstance(value, Param):
+                pending.value = value
+            else:
+                object.__setattr__(self, item, value)
+            return
 
-                # Else, just change the parameter value and signal change:
-                else:
-                    old_val = object.__getattribute__(self, item).value
-                    object.__getattribute__(self, item).value = value
-                    if old_val != value:
-                        object.__getattribute__(self, item).changed = True
+        # If it is a parameter:
+        if param is not None:
+            if self._lock is None:
+                self._set_param(param, value)
+            else:
+                with self._lock:
+                    self._set_param(param, value)
 
-            # otherwise, just set:
+        # If a new parameter is added, register it:
+        elif isinstance(value, Param):
+            if self._lock is None:
+                self._add_param(item, value)
             else:
-                object.__setattr__(self, item, value)
+                with self._lock:
+                    self._add_param(item, value)
 
         # otherwise, just set:
         else:
             object.__setattr__(self, item, value)
 
+    def _set_param(self, param, value):
+        # If we are replacing with a new parameter:
+        if isinstance(value, Param):
+            # If we are over-writing a param with a param, replace all
+            # its properties:
+            param.update_from(value)
+
+        # Else, just change the parameter value and signal change:
+        else:
+            if self._enforce_limits is not None:
+                try:
+                    value = param.validate(value, clamp=self._enforce_limits == "clamp")
+                except ValueError as e:
+                    key = self.name + "/" + param.name if self.name else param.name
+                    raise ValidationError([(key, value, str(e))])
+            param._set_bound_value(value)
+
+    def _locked(self):
+        # The lock if the object is thread-safe, a no-op context otherwise
+        if self._lock is None:
+            return _no_lock
+        return self._lock
+
+    def _add_param(self, item, param):
+        # A Param can belong to a single Parametrized only (the same Param
+        # instance can come e.g. from the annotations of a function used to
+        # make several parametrized objects):
+        if param.parametrized is not None:
+            param = copy(param)
+        param.bind(self, item)
+        params = self._params
+        params[item] = param
+        if self._snapshot is not None:
+            object.__setattr__(self, "_snapshot", None)
+        changed = param._changed
+        if changed:
+            self._dirty[item] = None
+        for tree in self._trees:
+            tree._schema_changed()
+            if changed:
+                tree._param_changed(param, added_at=len(params) - 1)
+
+    def _set_changed(self, item, changed):
+        # Keep the set of changed parameters, here and in the trees, in sync
+        # with the Param.changed flags:
+        if changed:
+            self._dirty[item] = None
+            for tree in self._trees:
+                tree._param_changed(self._params[item])
+        else:
+            self._dirty.pop(item, None)
+            if not self._dirty:
+                for tree in self._trees:
+                    tree._dirty.discard(self.name)
+
+    def _begin_batch(self):
+        """ Called when a batch of changes begins, see ParamContainer.batch.
+        """
+        pass
+
+    def _end_batch(self):
+        """ Called when a batch of changes ends, see ParamContainer.batch.
+        """
+        pass
+
     def as_hastraits(self):
         return HasTraitsLinked(self)
 
 
 class Param:
+    # Params have a fixed set of attributes, so that the many Param objects
+    # of large trees take less memory:
+    __slots__ = (
+        "parametrized",
+        "name",
+        "_value",
+        "limits",
+        "desc",
+        "gui",
+        "unit",
+        "scale",
+        "_changed",
+        "editable",
+        "loadable",
+    )
+    # properties describing the parameter, copied by update_from:
+    _properties = ("limits", "desc", "gui", "unit", "scale", "editable", "loadable")
+
     def __init__(
         self,
         value,
@@ -220,13 +509,15 @@ class Param:
         :param unit: physical unit, if existing
         :param scale: for real-valued parameters linear or logarithmic
         """
-        self.value = value
+        self.parametrized = None
+        self.name = None
+        self._value = value
         self.limits = limits
         self.desc = desc
         self.gui = gui
         self.unit = unit
         self.scale = scale
-        self.changed = True
+        self._changed = True
         self.editable = editable
         self.loadable = loadable
 
@@ -246,6 +537,132 @@ class Param:
         elif gui is False:
             self.gui = None
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        parametrized = self.parametrized
+        if parametrized is None:
+            self._value = value
+            return
+        # Same as setting the attribute of the parametrized object, with
+        # the limits enforced if required:
+        with parametrized._locked():
+            parametrized._set_param(self, value)
+
+    def _set_bound_value(self, value):
+        # Set the value of a bound parameter, marking it as changed (which
+        # notifies the trees) if it is different
+        old_value = self._value
+        self._value = value
+        # Keep the copy in the parametrized object in sync, so that
+        # parameter values can be read from it as normal attributes:
+        parametrized = self.parametrized
+        object.__setattr__(parametrized, self.name, value)
+        if parametrized._snapshot is not None:
+            object.__setattr__(parametrized, "_snapshot", None)
+        if old_value != value:
+            self.changed = True
+
+    @property
+    def changed(self):
+        return self._changed
+
+    @changed.setter
+    def changed(self, changed):
+        self._changed = changed
+        if self.parametrized is not None:
+            self.parametrized._set_changed(self.name, changed)
+
+    def __copy__(self):
+        # Copy the attributes directly, without re-running __init__
+        cls = type(self)
+        new = cls.__new__(cls)
+        new.parametrized = self.parametrized
+        new.name = self.name
+        new._value = self._value
+        new.limits = self.limits
+        new.desc = self.desc
+        new.gui = self.gui
+        new.unit = self.unit
+        new.scale = self.scale
+        new._changed = self._changed
+        new.editable = self.editable
+        new.loadable = self.loadable
+        if cls is not Param:
+            # subclasses can have attributes outside of the slots
+            new.__dict__.update(getattr(self, "__dict__", {}))
+        return new
+
+    def bind(self, parametrized, name):
+        """ Attach the parameter to a Parametrized object under a given name.
+        """
+        self.parametrized = parametrized
+        self.name = name
+        object.__setattr__(parametrized, name, self._value)
+
+    def update_from(self, other):
+        """ Replace all the properties of the parameter with the ones of
+        another parameter, keeping the binding to the parametrized object.
+        """
+        for name in Param._properties:
+            setattr(self, name, getattr(other, name))
+        self.value = other.value
+        self.changed = other.changed
+
+    def validate(self, value, clamp=False):
+        """ Check a value against the limits of the parameter: a list of
+        choices the value should be in, or a (minimum, maximum) tuple, for
+        numbers and for ranges (pairs of numbers). A bound of None is open.
+
+        Strings are matched to choices by their text, as given by
+        the combo box of the gui (e.g. "2" for a choice of 2).
+
+        :param value: the value to check
+        :param clamp: if True, numbers outside of the limits are brought to
+            the closest limit instead of being invalid
+        :return: the valid value
+        :raises ValueError: with the reason if the value is not valid
+        """
+        limits = self.limits
+        if limits is None:
+            return value
+
+        if isinstance(limits, list):
+            if value in limits:
+                return value
+            if isinstance(value, str):
+                for choice in limits:
+                    if str(choice) == value:
+                        return choice
+            raise ValueError(f"is not one of {limits}")
+
+        if isinstance(value, tuple):
+            if len(value) != 2:
+                raise ValueError("is not a range of two numbers")
+            low, high = (_check_bounds(v, limits, clamp) for v in value)
+            if low > high:
+                raise ValueError("has a start greater than its end")
+            return low, high
+        return _check_bounds(value, limits, clamp)
+
+
+def _check_bounds(value, limits, clamp):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("is not a number")
+    minimum, maximum = limits[:2]
+    if minimum is not None and value < minimum:
+        if not clamp:
+            raise ValueError(f"is smaller than the minimum {minimum}")
+        return minimum
+    if maximum is not None and value > maximum:
+        if not clamp:
+            raise ValueError(f"is greater than the maximum {maximum}")
+        return maximum
+    return value
+
 
 class ParameterTree:
     """ Class for managing a multi-level tree of parameters
@@ -254,56 +671,471 @@ class ParameterTree:
 
     def __init__(self):
         self.tracked = dict()
+        # names of the nodes with changed parameters:
+        self._dirty = set()
+        # version counter, incremented at every parameter change, and
+        # version of the last change of each Param, ordered from the oldest
+        # to the most recent change. Params added one after the other to a
+        # node share a single entry, the node, with the position and number
+        # of those params in _runs:
+        self.version = 0
+        self._versions = OrderedDict()
+        self._runs = dict()
+        self._last_run = None
+        # nested dictionary following the node names split at the slashes,
+        # with the node stored under the None key of its level:
+        self._index = dict()
+        # Params by their path in the flat format, built when needed (see
+        # _flat_index), and a counter of the changes of the set of paths:
+        self._flat = None
+        self._schema_version = 0
+        # functions called at every parameter change:
+        self._listeners = []
+        self._last_snapshot = None
 
     def add(self, parametrized):
-        """ Add new branched node to the tree.
+        """ Add new branched node to the tree. A node already in the tree
+        under the same name is replaced, and adding a node twice has no
+        effect.
+
         :param parametrized:
         :return:
         """
+        if self in parametrized._trees:
+            return
+        previous = self.tracked.get(parametrized.name)
+        if previous is not None:
+            self._remove(previous)
+
         self.tracked[parametrized.name] = parametrized
+        get_nested(self._index, parametrized.name.split("/"))[None] = parametrized
+        parametrized._trees.append(self)
+        self._schema_changed()
+        for i, param in enumerate(parametrized._params.values()):
+            self._param_changed(param, added_at=i)
+        if not parametrized._dirty:
+            self._dirty.discard(parametrized.name)
+
+    def _remove(self, parametrized):
+        # Stop tracking the params of a node which is replaced, so that
+        # its later changes do not reach the tree:
+        parametrized._trees.remove(self)
+        self._versions.pop(parametrized, None)
+        self._runs.pop(parametrized, None)
+        if self._last_run is parametrized:
+            self._last_run = None
+        for param in parametrized._params.values():
+            self._versions.pop(param, None)
+        self._dirty.discard(parametrized.name)
+        self._schema_changed()
+
+    def _schema_changed(self):
+        # The flat index is rebuilt when next needed, so that the order of
+        # the paths only depends on the nodes and their params:
+        self._flat = None
+        self._schema_version += 1
+
+    @property
+    def _flat_index(self):
+        flat = self._flat
+        if flat is None:
+            flat = {
+                node.name + "/" + name: param
+                for node in self.tracked.values()
+                for name, param in node._params.items()
+            }
+            self._flat = flat
+        return flat
+
+    def _param_changed(self, param, added_at=None):
+        # added_at is the position of a param just added to its node. The
+        # additions to a node are recorded under the node as long as they
+        # directly follow each other:
+        node = param.parametrized
+        self._dirty.add(node.name)
+        self.version += 1
+        entry = param
+        if added_at is not None:
+            run = self._runs.get(node)
+            if run is None:
+                self._runs[node] = (added_at, 1)
+                entry = node
+            elif self._last_run is node and run[0] + run[1] == added_at:
+                self._runs[node] = (run[0], run[1] + 1)
+                entry = node
+        # the node whose run of additions is the most recent entry:
+        self._last_run = node if entry is node else None
+        self._versions[entry] = self.version
+        self._versions.move_to_end(entry)
+        if self._listeners:
+            key = param.parametrized.name + "/" + param.name
+            for listener in self._listeners:
+                listener(key, param)
+
+    def _changed_since(self, since):
+        # Params changed after a version, from the most recent change
+        for entry, version in reversed(self._versions.items()):
+            if version <= since:
+                break
+            if isinstance(entry, Param):
+                yield entry
+            else:
+                # the params of a run of additions have consecutive versions
+                start, count = self._runs[entry]
+                end = start + count
+                first = end - min(count, version - since)
+                yield from islice(entry._params.values(), first, end)
+
+    def snapshot(self):
+        """ Immutable snapshot of the current state of the tree.
+
+        Snapshots share the values of the nodes which did not change between
+        them: the values of each node are the cached params.snapshot() of
+        the node, and making a new snapshot only gets the ones of the nodes
+        changed since the previous snapshot. If nothing changed, the previous
+        snapshot is returned.
+
+        :return: a TreeSnapshot
+        """
+        last = self._last_snapshot
+        if last is not None and last.version == self.version:
+            return last
+
+        if last is None:
+            nodes = {
+                name: node.params.snapshot() for name, node in self.tracked.items()
+            }
+        else:
+            nodes = dict(last._nodes)
+            for param in self._changed_since(last.version):
+                node = param.parametrized
+                nodes[node.name] = node.params.snapshot()
+
+        self._last_snapshot = TreeSnapshot(self.version, nodes)
+        return self._last_snapshot
+
+    def add_listener(self, listener):
+        """ Register a function to be called at every parameter change in the
+        tree, after the tree version has been incremented.
+
+        :param listener: function taking the path of the parameter in the
+            flat format (see serialize_flat) and the Param object
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
 
     def deserialize(self, restore_dict):
         """ Restore state of the tree based on contents of a restore_dict.
+        The dictionary can contain only part of the tree, as the deltas
+        produced by serialize(since=version), which are then applied as
+        patches to the current state.
+
+        If some parametrized objects enforce the limits of their parameters
+        (see Parametrized), their values are all checked before anything is
+        restored, and a ValidationError lists all the invalid ones.
+
         :param restore_dict: dictionary with the tree state to restore
         :return:
         """
-        for k, val in visit_dict(restore_dict):
+        if self._any_enforced():
+            self._check_enforced(
+                ("/".join(path + (k,)), node._params.get(k), val)
+                for path, node, entries in self.visit_nodes(restore_dict)
+                if node is not None
+                for k, val in entries.items()
+            )
+
+        for path, current, entries in self.visit_nodes(restore_dict):
+            blocked = False
+            try:
+                for k, val in entries.items():
+                    # Get the parameter of the current parameterized object,
+                    # if present:
+                    try:
+                        param = current._params[k]
+                    except (AttributeError, KeyError):
+                        warnings.warn(
+                            f"Trying to restore {list(path + (k,))}, but it is not "
+                            f"present in the parameter tree"
+                        )
+                        continue
+
+                    # If we explicitly made the parameter not loadable from the
+                    # restoring dictionary, skip. Skip also the restoring of the
+                    # loadable attribute, which is not loadable itself:
+                    if not param.loadable or k == "loadable":
+                        continue
+
+                    # try to stop the signal of the parameter has one, to
+                    # prevent infinite loops:
+                    if not blocked:
+                        blocked = True
+                        try:
+                            current.block_signal = True
+                        except AttributeError:
+                            pass
+
+                    # Set the actual attribute, if possible:
+                    setattr(current, k, val)
+
+            finally:
+                # unblock the refresh signal, also if a value was rejected
+                if blocked:
+                    try:
+                        current.block_signal = False
+                    except AttributeError:
+                        pass
+
+    def _any_enforced(self):
+        return any(
+            node._enforce_limits is not None for node in self.tracked.values()
+        )
+
+    @staticmethod
+    def _check_enforced(entries):
+        # Check the values of the parameters of the parametrized objects
+        # enforcing limits, given as (key, Param or None, value) tuples
+        violations = []
+        for key, param, val in entries:
+            if param is None or not param.loadable or param.name == "loadable":
+                continue
+            mode = param.parametrized._enforce_limits
+            if mode is None:
+                continue
             try:
-                # Get current parameterized object, if present:
-                current = self.tracked["/".join(k[:-1])]
-                loadable = current.params.items()[k[-1]].loadable
-
-                # If we explicitly made the parameter not loadable from the restoring
-                # dictionary, skip. Skip also the restoring of the loadable
-                # attribute, which is not loadable itself:
-                if not loadable or k[-1] == "loadable":
+                param.validate(val, clamp=mode == "clamp")
+            except ValueError as e:
+                violations.append((key, val, str(e)))
+        if violations:
+            raise ValidationError(violations)
+
+    def validate(self, restore_dict, clamp=False):
+        """ Check the values of a state dict against the limits of the
+        parameters (see Param.validate), before restoring it. All the
+        invalid values are reported at once. Entries which are not
+        parameters of the tree are left as they are.
+
+        :param restore_dict: nested dictionary, as generated by serialize
+        :param clamp: if True, numbers outside of the limits are clamped
+        :return: a copy of restore_dict with the valid values
+        :raises ValidationError: if any value is not valid
+        """
+        valid = dict()
+        violations = []
+        for path, node, entries in self.visit_nodes(restore_dict):
+            params = node._params if node is not None else dict()
+            level = get_nested(valid, path)
+            for k, val in entries.items():
+                param = params.get(k)
+                if param is None:
+                    level[k] = val
                     continue
+                try:
+                    level[k] = param.validate(val, clamp)
+                except ValueError as e:
+                    violations.append(("/".join(path + (k,)), val, str(e)))
+        if violations:
+            raise ValidationError(violations)
+        return valid
+
+    def validate_flat(self, restore_dict, clamp=False):
+        """ Check the values of a flat state dict, as generated by
+        serialize_flat, against the limits of the parameters. See validate.
+
+        :param restore_dict: flat dictionary of parameter paths and values
+        :param clamp: if True, numbers outside of the limits are clamped
+        :return: a copy of restore_dict with the valid values
+        :raises ValidationError: if any value is not valid
+        """
+        valid = dict()
+        violations = []
+        for key, val in restore_dict.items():
+            param = self._flat_index.get(key)
+            if param is None:
+                valid[key] = val
+                continue
+            try:
+                valid[key] = param.validate(val, clamp)
+            except ValueError as e:
+                violations.append((key, val, str(e)))
+        if violations:
+            raise ValidationError(violations)
+        return valid
+
+    def visit_nodes(self, state_dict):
+        """ Iterate over a nested state dict, as generated by serialize,
+        following the structure of the tree. The dict is walked together
+        with an index of the nodes, so that no path needs to be joined to
+        find them.
+
+        :param state_dict: nested dictionary with (part of) the tree state
+        :return: generator of (path, node, entries) tuples, where path is the
+            tuple of keys of a level of the dict, node the Parametrized at
+            that path (None if there is none) and entries a dict with the
+            items of the level which are not branches of the tree
+        """
+        to_visit = [(state_dict, self._index, ())]
+        while to_visit:
+            level_dict, level_index, path = to_visit.pop()
+            entries = dict()
+            for k, val in level_dict.items():
+                if isinstance(val, dict) and k in level_index:
+                    to_visit.append((val, level_index[k], path + (k,)))
+                else:
+                    entries[k] = val
+            if entries:
+                yield path, level_index.get(None), entries
+
+    def serialize(self, since=None):
+        """ Generate state dict that can be saved to restore the tree.
+
+        :param since: (optional) a previous value of the version attribute
+            of the tree. If given, only the parameters changed after that
+            version are included, and the cost is proportional to the
+            number of changes instead of the size of the tree.
+        """
+        new_dict = dict()
+        if since is not None:
+            for param in self._changed_since(since):
+                get_nested(new_dict, param.parametrized.name.split("/"))[
+                    param.name
+                ] = param.value
+            return new_dict
+
+        for k in self.tracked.keys():
+            set_nested(new_dict, k.split("/"), self.tracked[k].params.values)
+        return new_dict
+
+    def changed_values(self):
+        """ Nested dictionary with only the parameters changed since the last
+        acknowledgement, organized as the output of serialize. Only the nodes
+        with changes are visited.
+        """
+        new_dict = dict()
+        for k in self._dirty:
+            get_nested(new_dict, k.split("/")).update(
+                self.tracked[k].params.changed_values()
+            )
+        return new_dict
+
+    def acknowledge_changes(self):
+        """ Mark all the parameters in the tree as unchanged.
+        """
+        for k in list(self._dirty):
+            self.tracked[k].params.acknowledge_changes()
+
+    def serialize_flat(self, since=None):
+        """ Generate a flat state dict, with the full slash-separated paths
+        of the parameters as keys, e.g. {"a/b/param": value}.
+
+        :param since: (optional) a previous value of the version attribute
+            of the tree, to include only the parameters changed afterwards.
+        """
+        if since is None:
+            return {key: param.value for key, param in self._flat_index.items()}
+
+        new_dict = dict()
+        for param in self._changed_since(since):
+            new_dict[param.parametrized.name + "/" + param.name] = param.value
+        return new_dict
+
+    def deserialize_flat(self, restore_dict):
+        """ Restore state of the tree from a flat state dict, as generated
+        by serialize_flat. The dictionary can contain only part of the tree.
+        The limits of the parameters are checked as in deserialize.
+
+        :param restore_dict: flat dictionary with the tree state to restore
+        """
+        if self._any_enforced():
+            self._check_enforced(
+                (key, self._flat_index.get(key), val)
+                for key, val in restore_dict.items()
+            )
 
-                # try to stop the signal of the parameter has one, to prevent
-                # infinite loops:
+        blocked = dict()
+        try:
+            for key, val in restore_dict.items():
                 try:
-                    self.tracked["/".join(k[:-1])].block_signal = True
-                except AttributeError:
-                    pass
+                    param = self._flat_index[key]
+                except KeyError:
+                    warnings.warn(
+                        f"Trying to restore {key}, but it is not present in the parameter tree"
+                    )
+                    continue
+
+                if not param.loadable or param.name == "loadable":
+                    continue
 
-                # Set the actual attribute, if possible:
-                setattr(self.tracked["/".join(k[:-1])], k[-1], val)
+                current = param.parametrized
+                if id(current) not in blocked:
+                    blocked[id(current)] = current
+                    try:
+                        current.block_signal = True
+                    except AttributeError:
+                        pass
 
-                # unblock the refresh signal
+                setattr(current, param.name, val)
+
+        finally:
+            for current in blocked.values():
                 try:
-                    self.tracked["/".join(k[:-1])].block_signal = False
+                    current.block_signal = False
                 except AttributeError:
                     pass
 
-            except KeyError:
-                warnings.warn(
-                    f"Trying to restore {k}, but it is not present in the parameter tree"
-                )
+
+class TreeSnapshot:
+    """ Immutable state of a ParameterTree, see ParameterTree.snapshot
+
+    :param version: version of the tree when the snapshot was taken
+    :param nodes: dictionary of the node names and read-only mappings of
+        their parameter values
+    """
+
+    def __init__(self, version, nodes):
+        self.version = version
+        self._nodes = nodes
+
+    @property
+    def nodes(self):
+        return MappingProxyType(self._nodes)
 
     def serialize(self):
-        """ Generate state dict that can be saved to restore the tree.
+        """ The state as a nested dict, as ParameterTree.serialize
         """
         new_dict = dict()
-        for k in self.tracked.keys():
-            set_nested(new_dict, k.split("/"), self.tracked[k].params.values)
+        for name, values in self._nodes.items():
+            get_nested(new_dict, name.split("/")).update(values)
         return new_dict
+
+    def serialize_flat(self):
+        """ The state as a flat dict, as ParameterTree.serialize_flat
+        """
+        return {
+            name + "/" + k: v
+            for name, values in self._nodes.items()
+            for k, v in values.items()
+        }
+
+    def diff(self, other):
+        """ Differences between this and another snapshot. The values of the
+        nodes shared by the two snapshots are not compared.
+
+        :param other: a later (or earlier) TreeSnapshot of the same tree
+        :return: flat dict with the values of other which differ from the
+            ones in this snapshot, so that applying it with
+            deserialize_flat brings the tree from this state to the other
+        """
+        changes = dict()
+        for name, values in other._nodes.items():
+            old_values = self._nodes.get(name)
+            if old_values is values:
+                continue
+            if old_values is None:
+                old_values = dict()
+            for k, v in values.items():
+                if k not in old_values or old_values[k] != v:
+                    changes[name + "/" + k] = v
+        return changes
@@ -1,3 +1,4 @@
 from .qt_parametergui import ParameterGui, ParameterTreeGui
+from .table_view import ParameterTableGui
 from .controls import *
-from .precisionslider import *
\ No newline at end of file
+from .precisionslider import *
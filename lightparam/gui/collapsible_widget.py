@@ -26,25 +26,56 @@ class CollapseButton(QPushButton):
 
 
 class CollapsibleWidget(QWidget):
-    def __init__(self, child: QWidget, name="", expanded=True):
+    """ A widget with a button to show or hide its child.
+
+    Instead of the child, a function building it can be passed as
+    make_child, in which case the child is built only when first shown,
+    and, with release_hidden=True, deleted again when hidden.
+    """
+
+    def __init__(
+        self,
+        child: QWidget = None,
+        name="",
+        expanded=True,
+        make_child=None,
+        release_hidden=False,
+    ):
         super().__init__()
         self.setLayout(QVBoxLayout())
         self.btnCollapse = CollapseButton(name, expanded=expanded)
         self.layout().addWidget(self.btnCollapse)
         self.layout().setContentsMargins(0, 0, 0, 0)
-        self.child_widget = child
-        self.normalMaximum = child.maximumHeight()
-        self.layout().addWidget(self.child_widget)
+        self.make_child = make_child
+        self.release_hidden = release_hidden and make_child is not None
+        self.child_widget = None
+        self.normalMaximum = None
+        if child is not None:
+            self._set_child(child)
         self.btnCollapse.clicked.connect(self.toggle_collapse)
         self.expanded = expanded
         self.collapse()
 
+    def _set_child(self, child):
+        self.child_widget = child
+        self.normalMaximum = child.maximumHeight()
+        self.layout().addWidget(self.child_widget)
+
     def toggle_collapse(self):
         self.expanded = not self.expanded
         self.collapse()
 
     def collapse(self):
         if self.expanded:
-            self.child_widget.setMaximumHeight(0)
+            if self.child_widget is None:
+                return
+            if self.release_hidden:
+                self.layout().removeWidget(self.child_widget)
+                self.child_widget.deleteLater()
+                self.child_widget = None
+            else:
+                self.child_widget.setMaximumHeight(0)
         else:
+            if self.child_widget is None:
+                self._set_child(self.make_child())
             self.child_widget.setMaximumHeight(self.normalMaximum)
@@ -16,10 +16,24 @@ from PyQt5.QtWidgets import (
     QToolButton,
 )
 
+from contextlib import contextmanager
 from math import log
 from ..utils import pretty_name
 
 
+@contextmanager
+def signals_blocked(*widgets):
+    """ Context manager blocking the signals of the given Qt objects, to
+    update their display without them notifying the change back.
+    """
+    previous = [widget.blockSignals(True) for widget in widgets]
+    try:
+        yield
+    finally:
+        for widget, was_blocked in zip(widgets, previous):
+            widget.blockSignals(was_blocked)
+
+
 class Control(QWidget):
     def __init__(self, parametrized, name):
         super().__init__()
@@ -32,6 +46,9 @@ class Control(QWidget):
 
         self.setEnabled(self.param.editable)
 
+    def update_display(self):
+        pass
+
 
 class ControlSpin(Control):
     def __init__(self, parametrized, name):
@@ -60,7 +77,9 @@ class ControlSpin(Control):
         self.control.setSuffix(" " + self.param.unit)
 
     def update_display(self):
-        self.control.setValue(self.param.value)
+        if self.control.value() != self.param.value:
+            with signals_blocked(self.control):
+                self.control.setValue(self.param.value)
 
     def update_param(self):
         setattr(self.parametrized, self.param_name, self.control.value())
@@ -79,7 +98,8 @@ class ControlCheck(Control):
         self.control.clicked.connect(self.update_param)
 
     def update_display(self):
-        self.control.setValue(self.param.value)
+        with signals_blocked(self.control):
+            self.control.setChecked(self.param.value)
 
     def update_param(self):
         setattr(self.parametrized, self.param_name, self.control.isChecked())
@@ -145,12 +165,13 @@ class ControlToggleIcon(QToolButton, Control):
         if self.icon_on is None:
             self.setText(self.text_on if self.param.value else self.text_off)
         else:
-            if not self.param.value:
-                self.setIcon(self.icon_off)
-                self.setChecked(False)
-            else:
-                self.setIcon(self.icon_on)
-                self.setChecked(True)
+            with signals_blocked(self):
+                if not self.param.value:
+                    self.setIcon(self.icon_off)
+                    self.setChecked(False)
+                else:
+                    self.setIcon(self.icon_on)
+                    self.setChecked(True)
             self.setToolTip(self.text_on if self.param.value else self.text_off)
 
 
@@ -170,7 +191,8 @@ class ControlCombo(Control):
         self.control.currentTextChanged.connect(self.update_param)
 
     def update_display(self):
-        self.control.setCurrentText(str(self.param.value))
+        with signals_blocked(self.control):
+            self.control.setCurrentText(str(self.param.value))
 
     def update_param(self):
         setattr(self.parametrized, self.param_name, self.control.currentText())
@@ -191,7 +213,10 @@ class ControlText(Control):
         self.control.textChanged.connect(self.update_param)
 
     def update_display(self):
-        self.control.setText(str(self.param.value))
+        # do not reset the cursor if the change comes from typing:
+        if self.control.text() != str(self.param.value):
+            with signals_blocked(self.control):
+                self.control.setText(str(self.param.value))
 
     def update_param(self):
         setattr(self.parametrized, self.param_name, self.item_type(self.control.text()))
@@ -11,18 +11,18 @@ from PyQt5.QtWidgets import (
     QLabel,
     QGraphicsOpacityEffect,
 )
-from PyQt5.QtGui import QPainter, QColor, QPen
-from PyQt5.QtCore import Qt, pyqtSignal, QPointF, QPoint
+from PyQt5.QtGui import QPainter, QColor, QPen, QPainterPath, QPixmap, QPolygonF
+from PyQt5.QtCore import Qt, pyqtSignal, QPointF, QPoint, QTimer
 
 import math
 from lightparam import Param, Parametrized
-from lightparam.gui.controls import pretty_name, Control
+from lightparam.gui.controls import pretty_name, Control, signals_blocked
 
 
 class RangeSliderWidgetWithNumbers(Control, QWidget):
     sig_changed = pyqtSignal(float, float)
 
-    def __init__(self, parametrized, name, precision=2):
+    def __init__(self, parametrized, name, precision=2, frame_interval=None):
         super().__init__(parametrized, name)
         self.grid_layout = QGridLayout()
         self.grid_layout.setSpacing(0)
@@ -49,7 +49,11 @@ class RangeSliderWidgetWithNumbers(Control, QWidget):
         self.grid_layout.addWidget(self.label_name, 0, 1)
         self.grid_layout.addWidget(self.spin_right, 0, 2)
         self.range_slider = RangeSliderWidget(
-            min_val, max_val, left=self.left, right=self.right
+            min_val,
+            max_val,
+            left=self.left,
+            right=self.right,
+            frame_interval=frame_interval,
         )
         self.grid_layout.addWidget(self.range_slider, 1, 0, 1, 3)
         self.setLayout(self.grid_layout)
@@ -58,8 +62,11 @@ class RangeSliderWidgetWithNumbers(Control, QWidget):
         self.update_display()
 
     def update_values(self, l, r):
-        self.spin_left.setValue(l)
-        self.spin_right.setValue(r)
+        # the spin boxes are only updated to display the values, which are
+        # set to the parameter once, below:
+        with signals_blocked(self.spin_left, self.spin_right):
+            self.spin_left.setValue(l)
+            self.spin_right.setValue(r)
         self.sig_changed.emit(l, r)
         self.left, self.right = l, r
         self.update_param()
@@ -80,8 +87,10 @@ class RangeSliderWidgetWithNumbers(Control, QWidget):
 
     def update_display(self):
         l, r = getattr(self.parametrized, self.param_name)
-        self.spin_left.setValue(l)
-        self.spin_right.setValue(r)
+        self.left, self.right = l, r
+        with signals_blocked(self.spin_left, self.spin_right):
+            self.spin_left.setValue(l)
+            self.spin_right.setValue(r)
         self.range_slider.left = l
         self.range_slider.right = r
         self.range_slider.update()
@@ -93,7 +102,7 @@ class RangeSliderWidgetWithNumbers(Control, QWidget):
 class SliderWidgetWithNumbers(QWidget):
     sig_changed = pyqtSignal(float)
 
-    def __init__(self, parametrized, name):
+    def __init__(self, parametrized, name, frame_interval=None):
         super().__init__()
         self.parametrized = parametrized
         self.param_name = name
@@ -120,13 +129,16 @@ class SliderWidgetWithNumbers(QWidget):
         self.label_name.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         self.grid_layout.addWidget(self.label_name, 0, 0)
         self.grid_layout.addWidget(self.spin_val, 0, 1)
-        self.slider = PrecisionSingleSlider(min_val, max_val, default_value=self.value)
+        self.slider = PrecisionSingleSlider(
+            min_val, max_val, default_value=self.value, frame_interval=frame_interval
+        )
         self.grid_layout.addWidget(self.slider, 1, 0, 1, 2)
         self.setLayout(self.grid_layout)
         self.slider.sig_changed.connect(self.update_values)
 
     def update_values(self, val):
-        self.spin_val.setValue(val)
+        with signals_blocked(self.spin_val):
+            self.spin_val.setValue(val)
         self.value = val
         self.sig_changed.emit(val)
         self.update_param()
@@ -140,8 +152,10 @@ class SliderWidgetWithNumbers(QWidget):
 
     def update_display(self):
         val = getattr(self.parametrized, self.param_name)
+        self.value = val
         self.slider.pos = val
-        self.spin_val.setValue(val)
+        with signals_blocked(self.spin_val):
+            self.spin_val.setValue(val)
         self.slider.update()
 
     def update_param(self):
@@ -151,63 +165,114 @@ class SliderWidgetWithNumbers(QWidget):
 class SliderPopupLines(QWidget):
     """ A widget that displays the guiding lines for the fine adjustment
 
+    The background and the static guiding lines are drawn once in a pixmap,
+    which is redrawn only when the widget is resized or invalidate_guides
+    is called (e.g. when the magnification changes), so that repaints on
+    mouse movement draw just the line of the current value.
     """
 
-    def __init__(self, *args, f_line, **kwargs):
+    def __init__(self, *args, f_line, f_line_array=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.f_line = f_line
+        self.f_line_array = f_line_array
         self.fadeub = QGraphicsOpacityEffect(self)
         self.current_value = 0
+        self._guides = None
+        self._line_factors = None
 
     def set_current_value(self, val):
         self.current_value = val
         self.update()
 
-    def paintEvent(self, e):
-        size = self.size()
-        w = size.width()
-        h = size.height()
+    def invalidate_guides(self):
+        self._guides = None
+        self._line_factors = None
+        self.update()
 
-        halfw = w / 2
+    def resizeEvent(self, e):
+        self.invalidate_guides()
+        super().resizeEvent(e)
 
+    def _draw_guides(self, w, h):
+        halfw = w / 2
         dy = 1
 
-        qp = QPainter()
-        qp.begin(self)
-        # qp.setRenderHint(QPainter.Antialiasing)
+        if self.f_line_array is not None:
+            self._line_factors = self.f_line_array(range(h))
+        else:
+            self._line_factors = [self.f_line(y) for y in range(h)]
 
+        ratio = self.devicePixelRatioF()
+        self._guides = QPixmap(int(round(w * ratio)), int(round(h * ratio)))
+        self._guides.setDevicePixelRatio(ratio)
+        self._guides.fill(Qt.transparent)
+
+        qp = QPainter()
+        qp.begin(self._guides)
         qp.setPen(Qt.NoPen)
         qp.setBrush(QColor(0, 0, 0, 70))
         qp.drawRoundedRect(0, 0, w, h, 3, 3)
 
         qp.setPen(QColor(100, 100, 100))
-
+        qp.setBrush(Qt.NoBrush)
+        lines = QPainterPath()
         for xs in [-halfw * 3 / 4, -halfw / 2, -halfw / 4, -halfw / 8, -halfw / 16]:
             for coeff in [-1, 1]:
                 x_s = xs * coeff
-                x_p = x_s
-                y_p = dy
+                lines.moveTo(x_s + halfw, dy)
                 for y in range(dy * 2, h, dy):
-                    x = x_s * self.f_line(y)
-                    qp.drawLine(x_p + halfw, y_p, x + halfw, y)
-                    x_p = x
-                    y_p = y
+                    lines.lineTo(x_s * self._line_factors[y] + halfw, y)
+        qp.drawPath(lines)
+        qp.end()
+
+    def paintEvent(self, e):
+        size = self.size()
+        w = size.width()
+        h = size.height()
+
+        halfw = w / 2
+
+        if self._guides is None:
+            self._draw_guides(w, h)
+
+        qp = QPainter()
+        qp.begin(self)
+        # qp.setRenderHint(QPainter.Antialiasing)
+        qp.drawPixmap(0, 0, self._guides)
 
         x_s = self.current_value
-        x_p = x_s
-        y_p = 0
         qp.setPen(QColor(250, 250, 250))
-        for y in range(dy, h, dy):
-            x = x_s * self.f_line(y)
-            qp.drawLine(x_p + halfw, y_p, x + halfw, y)
-            x_p = x
-            y_p = y
+        qp.drawPolyline(
+            QPolygonF(
+                [QPointF(x_s + halfw, 0)]
+                + [
+                    QPointF(x_s * factor + halfw, y)
+                    for y, factor in enumerate(self._line_factors)
+                    if y > 0
+                ]
+            )
+        )
 
         qp.end()
 
 
 class PrecisionSlider(QWidget):
-    def __init__(self, min=0.0, max=1.0, max_magnification=50, magnifier_height=200):
+    """ Base class of the precision sliders
+
+    :param frame_interval: (optional) if given, mouse movements are
+        accumulated and applied at most once every frame_interval
+        milliseconds (e.g. 16 for 60 Hz displays), the last movement being
+        always applied at the latest when the mouse is released
+    """
+
+    def __init__(
+        self,
+        min=0.0,
+        max=1.0,
+        max_magnification=50,
+        magnifier_height=200,
+        frame_interval=None,
+    ):
         super().__init__()
 
         self.min_val = min
@@ -221,15 +286,21 @@ class PrecisionSlider(QWidget):
         self.triangle_size = 8
         self.magnifier_height = magnifier_height
         self.max_magnification = max_magnification
-        self.square_coef = (
-            1 - 1 / self.max_magnification
-        ) / self.magnifier_height ** 1.5
+        self._set_square_coef()
 
         self.mouse_status = 0
         self.mouse_start_x = 0
         self.mouse_start_y = 0
 
-        self.popup = SliderPopupLines(self, f_line=self.f_line)
+        self.frame_interval = frame_interval
+        self._pending_move = None
+        self._move_timer = QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.timeout.connect(self._apply_pending_move)
+
+        self.popup = SliderPopupLines(
+            self, f_line=self.f_line, f_line_array=self.f_line_array
+        )
         self.popup.setWindowFlags(
             Qt.Tool | Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint
         )
@@ -238,6 +309,22 @@ class PrecisionSlider(QWidget):
 
         self.setMinimumHeight(self.padding_top * 3)
 
+    def set_magnification(self, max_magnification=None, magnifier_height=None):
+        """ Change the maximum magnification and/or the height of the
+        magnifier popup.
+        """
+        if max_magnification is not None:
+            self.max_magnification = max_magnification
+        if magnifier_height is not None:
+            self.magnifier_height = magnifier_height
+        self._set_square_coef()
+        self.popup.invalidate_guides()
+
+    def _set_square_coef(self):
+        self.square_coef = (
+            1 - 1 / self.max_magnification
+        ) / self.magnifier_height ** 1.5
+
     def _equilateral_triangle_points(self, origin):
         h = self.triangle_size
         w = self.triangle_size / (math.sqrt(3))
@@ -252,20 +339,34 @@ class PrecisionSlider(QWidget):
     def f_amp(self, y):
         """ Function which maps a y position of the mouse to an amplification factor
 
-        :param y:
-        :return:
+        The factor stays constant beyond magnifier_height.
+
+        :param y: distance in pixels from the slider
+        :return: amplification factor
         """
         # TODO a more reasonable one
         return 1 - self.square_coef * min(y, self.magnifier_height) ** 1.5
 
     def f_line(self, y):
-        """ Function that gives the
+        """ Function that gives the horizontal scaling of the guide lines
+        in the magnifier popup, the inverse of f_amp
+
+        :param y: distance in pixels from the slider
+        :return: scaling factor
+        """
+        return 1 / self.f_amp(y)
+
+    def f_amp_array(self, ys):
+        """ f_amp for a sequence of y positions, returned as a list
+        """
+        c = self.square_coef
+        h = self.magnifier_height
+        return [1 - c * min(y, h) ** 1.5 for y in ys]
 
-        :param coef:
-        :param magnifier_height:
-        :return:
+    def f_line_array(self, ys):
+        """ f_line for a sequence of y positions, returned as a list
         """
-        return 1 / (1 - self.square_coef * min(y, self.magnifier_height) ** 1.5)
+        return [1 / amp for amp in self.f_amp_array(ys)]
 
     def val_to_vis(self, val):
         size = self.size()
@@ -289,7 +390,28 @@ class PrecisionSlider(QWidget):
         p = self.padding_side
         return self.min_val + (self.max_val - self.min_val) * (vis - p) / (w - 2 * p)
 
+    def mouseMoveEvent(self, ev):
+        if self.frame_interval is None:
+            self.apply_move(ev.x(), ev.y())
+        else:
+            self._pending_move = (ev.x(), ev.y())
+            if not self._move_timer.isActive():
+                self._move_timer.start(self.frame_interval)
+
+    def _apply_pending_move(self):
+        if self._pending_move is not None:
+            x, y = self._pending_move
+            self._pending_move = None
+            self.apply_move(x, y)
+
+    def apply_move(self, x, y):
+        """ Update the slider for the mouse being at (x, y)
+        """
+        pass
+
     def mouseReleaseEvent(self, QMouseEvent):
+        self._move_timer.stop()
+        self._apply_pending_move()
         self.mouse_status = 0
         self.popup.hide()
         self.update()
@@ -364,10 +486,9 @@ class PrecisionSingleSlider(PrecisionSlider):
     def set_pos_vis(self, visval):
         self.pos = min(self.max_val, max(self.min_val, self.vis_to_val(visval)))
 
-    def mouseMoveEvent(self, ev):
-        x = ev.x()
+    def apply_move(self, x, y):
         delta = x - self.mouse_start_x
-        amplification = self.f_amp(abs(ev.y() - self.mouse_start_y))
+        amplification = self.f_amp(abs(y - self.mouse_start_y))
 
         x_n = self.vis_to_val_relative(delta * amplification)
 
@@ -486,10 +607,9 @@ class RangeSliderWidget(PrecisionSlider):
             self.left = l
             self.right = r
 
-    def mouseMoveEvent(self, ev):
-        x = ev.x()
+    def apply_move(self, x, y):
         delta = x - self.mouse_start_x
-        amplification = self.f_amp(abs(ev.y() - self.mouse_start_y))
+        amplification = self.f_amp(abs(y - self.mouse_start_y))
 
         x_n = self.vis_to_val_relative(delta * amplification)
         if QApplication.instance().keyboardModifiers() == Qt.AltModifier:
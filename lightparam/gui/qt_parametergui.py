@@ -1,3 +1,5 @@
+from functools import partial
+
 from PyQt5.QtWidgets import QApplication
 from lightparam.gui.controls import *
 from lightparam.gui.collapsible_widget import CollapsibleWidget
@@ -20,19 +22,70 @@ gui_map = dict(
 
 
 class ParameterTreeGui(QWidget):
-    def __init__(self, param_tree):
+    """ A Qt gui for a parameter tree, with a collapsible section for each
+    of its parametrized objects.
+
+    :param param_tree: the ParameterTree
+    :param lazy: if True, the gui of each parametrized object is built
+        only when its section is first shown
+    :param release_hidden: if True (and lazy), the gui of each parametrized
+        object is deleted when its section is hidden
+    """
+
+    def __init__(self, param_tree, lazy=True, release_hidden=False):
         super().__init__()
         self.param_tree = param_tree
         self.inner_layout = QVBoxLayout()
 
         self.inner_layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.inner_layout)
-        self.paramtrized_widgets = {}
+        self.collapsible_widgets = {}
 
         for name in self.param_tree.tracked.keys():
-            widget = ParameterGui(self.param_tree.tracked[name])
-            self.paramtrized_widgets[name] = widget
-            self.inner_layout.addWidget(CollapsibleWidget(widget, name=name))
+            if lazy:
+                widget = CollapsibleWidget(
+                    name=name,
+                    make_child=partial(ParameterGui, self.param_tree.tracked[name]),
+                    release_hidden=release_hidden,
+                )
+            else:
+                widget = CollapsibleWidget(
+                    ParameterGui(self.param_tree.tracked[name]), name=name
+                )
+            self.collapsible_widgets[name] = widget
+            self.inner_layout.addWidget(widget)
+
+    def refresh_widgets(self, changes=None):
+        """ Update the widgets to the current parameter values.
+
+        :param changes: (optional) nested dict of the changed parameters,
+            e.g. as returned by param_tree.changed_values(),
+            param_tree.serialize(since=version) or the dict passed to
+            param_tree.deserialize. Only the widgets of those parameters
+            are updated. If not given, all built widgets are updated.
+        """
+        if changes is None:
+            for widget in self.paramtrized_widgets.values():
+                widget.refresh_widgets()
+            return
+
+        for path, node, entries in self.param_tree.visit_nodes(changes):
+            if node is None:
+                continue
+            widget = self.collapsible_widgets.get(node.name)
+            if widget is not None and widget.child_widget is not None:
+                widget.child_widget.refresh_widgets(entries)
+
+    @property
+    def paramtrized_widgets(self):
+        """ The ParameterGui of each parametrized object which is currently
+        built.
+        """
+        return {
+            name: widget.child_widget
+            for name, widget in self.collapsible_widgets.items()
+            if widget.child_widget is not None
+        }
 
 
 class ParameterGui(QWidget):
@@ -55,6 +108,12 @@ class ParameterGui(QWidget):
             self.param_widgets[name] = widget
             self.inner_layout.addWidget(widget)
 
+        # Keep the widgets in sync with changes made elsewhere:
+        try:
+            self.parametrized.sig_param_changed.connect(self.refresh_widgets)
+        except AttributeError:
+            pass
+
     @staticmethod
     def make_widget(parametrized, name):
         gui_type = parametrized.params[name].gui
@@ -68,10 +127,19 @@ class ParameterGui(QWidget):
                 parametrized.params[name].gui,
             )
 
-    def refresh_widgets(self):
-        for name in self.parametrized.params.items().keys():
-            if name in self.param_widgets:
-                self.param_widgets[name].update_display()
+    def refresh_widgets(self, changed=None):
+        """ Update the widgets to the current parameter values.
+
+        :param changed: (optional) names of the parameters to update, e.g.
+            the dict emitted by sig_param_changed or returned by
+            params.changed_values(). If not given, all widgets are updated.
+        """
+        if changed is None:
+            changed = self.param_widgets.keys()
+        for name in changed:
+            widget = self.param_widgets.get(name)
+            if widget is not None:
+                widget.update_display()
 
 
 if __name__ == "__main__":
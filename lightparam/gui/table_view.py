@@ -0,0 +1,197 @@
+""" A model/view gui for parametrized objects with many parameters
+
+Only the rows which are visible are painted, and the control from gui_map
+is instantiated just for the parameter being edited, so the cost of the
+gui does not grow with the number of parameters.
+"""
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtWidgets import (
+    QApplication,
+    QTableView,
+    QStyledItemDelegate,
+    QHeaderView,
+    QAbstractItemView,
+)
+
+from lightparam import Parametrized, Param
+from lightparam.gui.qt_parametergui import gui_map
+from lightparam.utils import pretty_name
+
+
+def format_value(value):
+    """ Text of a parameter value in the table: numbers in a compact
+    format, and anything else as its str.
+    """
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, tuple):
+        return ", ".join(format_value(v) for v in value)
+    return str(value)
+
+
+class ParameterTableModel(QAbstractTableModel):
+    """ Table model over the ParamContainer of a parametrized object, with
+    a row per parameter and the name and value as columns.
+    """
+
+    def __init__(self, parametrized, parent=None):
+        super().__init__(parent)
+        self.parametrized = parametrized
+        self.param_names = []
+        self.rows = {}
+        self.refresh_params()
+        try:
+            parametrized.sig_param_changed.connect(self.params_changed)
+        except AttributeError:
+            pass
+
+    def refresh_params(self):
+        """ Update the rows after parameters are added to the parametrized
+        object.
+        """
+        self.beginResetModel()
+        self.param_names = list(self.parametrized.params.keys())
+        self.rows = {name: i for i, name in enumerate(self.param_names)}
+        self.endResetModel()
+
+    def refresh_values(self):
+        """ Signal that the values of all parameters could have changed.
+        """
+        if self.param_names:
+            self.dataChanged.emit(
+                self.index(0, 1), self.index(len(self.param_names) - 1, 1)
+            )
+
+    def params_changed(self, changes):
+        for name in changes.keys():
+            row = self.rows.get(name)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 1), self.index(row, 1))
+
+    def param(self, index):
+        return self.parametrized.params[self.param_names[index.row()]]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.param_names)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return ["Parameter", "Value"][section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        param = self.param(index)
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return pretty_name(param.name)
+            text = format_value(param.value)
+            if param.unit:
+                text += " " + param.unit
+            return text
+        if role == Qt.ToolTipRole and param.desc:
+            return param.desc
+        return QVariant()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        param = self.param(index)
+        if index.column() == 1 and param.editable and param.gui in gui_map:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        setattr(self.parametrized, self.param_names[index.row()], value)
+        self.dataChanged.emit(index, index)
+        return True
+
+
+class ParameterDelegate(QStyledItemDelegate):
+    """ Delegate editing a parameter with the control from gui_map which
+    would be used for it in a ParameterGui.
+    """
+
+    def createEditor(self, parent, option, index):
+        model = index.model()
+        param = model.param(index)
+        editor = gui_map[param.gui](model.parametrized, param.name)
+        editor.setParent(parent)
+        editor.setAutoFillBackground(True)
+        # the name is already in the first column:
+        for label in ["label", "label_name"]:
+            try:
+                getattr(editor, label).hide()
+            except AttributeError:
+                pass
+        return editor
+
+    def setEditorData(self, editor, index):
+        try:
+            editor.update_display()
+        except AttributeError:
+            pass
+
+    def setModelData(self, editor, model, index):
+        # The controls set the parameter themselves, just update the view:
+        model.dataChanged.emit(index, index)
+
+    def updateEditorGeometry(self, editor, option, index):
+        rect = option.rect
+        rect.setHeight(max(rect.height(), editor.sizeHint().height()))
+        editor.setGeometry(rect)
+
+
+class ParameterTableGui(QTableView):
+    """ A Qt gui for a parametrized class, as a table with a row per
+    parameter, suited to objects with many parameters.
+    """
+
+    def __init__(self, parametrized):
+        super().__init__()
+        self.parametrized = parametrized
+        self.param_model = ParameterTableModel(parametrized, self)
+        self.setModel(self.param_model)
+        self.setItemDelegateForColumn(1, ParameterDelegate(self))
+        self.setEditTriggers(
+            QAbstractItemView.DoubleClicked
+            | QAbstractItemView.SelectedClicked
+            | QAbstractItemView.EditKeyPressed
+        )
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalHeader().hide()
+        self.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.horizontalHeader().setStretchLastSection(True)
+
+    def refresh_widgets(self):
+        self.param_model.refresh_values()
+
+
+if __name__ == "__main__":
+
+    class ManyParametrized(Parametrized):
+        def __init__(self, *args, n_channels=5000, **kwargs):
+            super().__init__(*args, **kwargs)
+            for i in range(n_channels):
+                setattr(self, f"gain_{i}", Param(1.0, (0.0, 10.0), unit="dB"))
+            self.a_list = Param("a", ["a", "b", "c"])
+            self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+
+    app = QApplication([])
+    p = ParameterTableGui(ManyParametrized())
+    p.show()
+    app.exec_()
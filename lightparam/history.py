@@ -0,0 +1,197 @@
+""" Undo/redo history of the parameter changes of a ParameterTree
+
+"""
+
+from collections import deque
+from sys import getsizeof
+import time
+
+
+class HistoryEntry:
+    """ A change of a parameter, from old to new value
+    """
+
+    def __init__(self, key, old, new, timestamp):
+        self.key = key
+        self.old = old
+        self.new = new
+        self.timestamp = timestamp
+
+    def size(self):
+        """ Approximate memory used by the entry, in bytes
+        """
+        return getsizeof(self) + getsizeof(self.old) + getsizeof(self.new)
+
+
+class ParameterHistory:
+    """ Journal of the changes of the parameters of a tree, which can be
+    undone and redone.
+
+    Successive changes of the same parameter within coalesce_interval
+    seconds (e.g. while dragging a slider) are merged in a single entry.
+    When the journal exceeds max_entries entries or max_bytes bytes, the
+    oldest entries are dropped.
+
+    The versions of the history count the entries recorded since its
+    creation: version v is the state after the first v entries. Jumping
+    between versions sets each parameter changed in between only once,
+    without replaying the history from the start.
+
+    :param tree: the ParameterTree to follow
+    :param max_entries: maximum number of entries, None for no limit
+    :param max_bytes: (optional) maximum approximate memory of the entries
+    :param coalesce_interval: time in seconds within which successive
+        changes of the same parameter are merged, 0 to record all changes
+    """
+
+    def __init__(self, tree, max_entries=1000, max_bytes=None, coalesce_interval=0.5):
+        self.tree = tree
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.coalesce_interval = coalesce_interval
+
+        self._entries = deque()
+        self._n_bytes = 0
+        # number of entries dropped from the start of the journal:
+        self._n_dropped = 0
+        # number of entries of the journal which are applied:
+        self._position = 0
+        # current values, to know the previous value at each change:
+        self._values = tree.serialize_flat()
+        self._applying = False
+        tree.add_listener(self._param_changed)
+
+    @property
+    def version(self):
+        """ Version of the current state
+        """
+        return self._n_dropped + self._position
+
+    @property
+    def first_version(self):
+        """ Oldest version which can be restored
+        """
+        return self._n_dropped
+
+    @property
+    def last_version(self):
+        """ Most recent version which can be restored
+        """
+        return self._n_dropped + len(self._entries)
+
+    @property
+    def can_undo(self):
+        return self._position > 0
+
+    @property
+    def can_redo(self):
+        return self._position < len(self._entries)
+
+    def _param_changed(self, key, param):
+        new = param.value
+        if key not in self._values:
+            # a parameter added to the tree, not a change
+            self._values[key] = new
+            return
+        old = self._values[key]
+        self._values[key] = new
+        if self._applying or old == new:
+            return
+
+        # A new change discards the changes which were undone:
+        while len(self._entries) > self._position:
+            self._n_bytes -= self._entries.pop().size()
+
+        now = time.monotonic()
+        if self._entries:
+            last = self._entries[-1]
+            if last.key == key and now - last.timestamp < self.coalesce_interval:
+                self._n_bytes -= last.size()
+                last.new = new
+                last.timestamp = now
+                self._n_bytes += last.size()
+                return
+
+        entry = HistoryEntry(key, old, new, now)
+        self._entries.append(entry)
+        self._n_bytes += entry.size()
+        self._position += 1
+        self._drop_oldest()
+
+    def _drop_oldest(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._n_bytes > self.max_bytes)
+        ):
+            self._n_bytes -= self._entries.popleft().size()
+            self._n_dropped += 1
+            self._position -= 1
+
+    def undo(self):
+        """ Undo the last change, if any
+        """
+        if self.can_undo:
+            self.jump(self.version - 1)
+
+    def redo(self):
+        """ Redo the last undone change, if any
+        """
+        if self.can_redo:
+            self.jump(self.version + 1)
+
+    def jump(self, version):
+        """ Bring the tree to the state of a given version
+
+        :param version: version between first_version and last_version
+        """
+        if not self.first_version <= version <= self.last_version:
+            raise ValueError(
+                f"Version {version} is not in the history, "
+                f"which goes from {self.first_version} to {self.last_version}"
+            )
+        target = version - self._n_dropped
+
+        # Find the value each parameter had at the target version:
+        values = dict()
+        if target < self._position:
+            for i in range(self._position - 1, target - 1, -1):
+                entry = self._entries[i]
+                values[entry.key] = entry.old
+        else:
+            for i in range(self._position, target):
+                entry = self._entries[i]
+                values[entry.key] = entry.new
+
+        self._applying = True
+        try:
+            self._apply(values)
+        finally:
+            self._applying = False
+        self._position = target
+
+    def _apply(self, values):
+        # Set the values of each node in a single batch:
+        by_node = dict()
+        for key, value in values.items():
+            param = self.tree._flat_index.get(key)
+            if param is None:
+                # the parameter was removed with a replaced node
+                continue
+            node = param.parametrized
+            by_node.setdefault(id(node), (node, dict()))[1][param.name] = value
+
+        for node, node_values in by_node.values():
+            node.params.update(node_values)
+
+    def clear(self):
+        """ Drop all the entries
+        """
+        self._n_dropped += self._position
+        self._entries.clear()
+        self._n_bytes = 0
+        self._position = 0
+
+    def close(self):
+        """ Stop following the changes of the tree
+        """
+        self.tree.remove_listener(self._param_changed)
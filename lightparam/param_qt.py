@@ -1,43 +1,142 @@
 from lightparam import Parametrized, Param, ParameterTree
 from lightparam.gui import ParameterGui
 from PyQt5.QtWidgets import QApplication, QDialog, QWidget, QLayout
-from PyQt5.QtCore import pyqtSignal, QObject
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QThread, Qt
 
 
-class ParametrizedQt(Parametrized, QObject):
-    sig_param_changed = pyqtSignal(dict)
+class ParamSignalMixin:
+    """ Emission of sig_param_changed when parameters are set, shared by
+    ParametrizedQt and ParametrizedWidget. Changes made in a batch (see
+    ParamContainer.batch) are emitted once, merged in a single dictionary.
+    The emission rate can be limited with set_signal_rate.
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    For thread-safe objects (created with thread_safe=True), changes made
+    from other threads are queued and emitted from the thread the object
+    lives in.
+    """
+
+    def _init_signal(self):
         self.block_signal = False
+        self._batch_depth = 0
+        self._batch_changes = dict()
+        self._signal_interval = None
+        self._signal_debounce = False
+        self._throttled_params = None
+        self._pending_changes = dict()
+        self._signal_timer = None
+        self._sig_thread_changes.connect(self._emit_changes, Qt.QueuedConnection)
 
     def __setattr__(self, item, value):
         super().__setattr__(item, value)
-        if hasattr(self, "params"):
-            try:
-                assert isinstance(self.__dict__[item], Param)
-                if not getattr(self, "block_signal", False):
-                    self.sig_param_changed.emit({item: value})
-            except (KeyError, AssertionError):
-                pass
+        if hasattr(self, "params") and item in self._params:
+            if not getattr(self, "block_signal", False):
+                # the stored value, which can differ from the one set
+                # (e.g. clamped to the limits):
+                value = getattr(self, item)
+                if self._batch_depth > 0:
+                    self._batch_changes[item] = value
+                else:
+                    self._emit_changes({item: value})
+
+    def _begin_batch(self):
+        self._batch_depth += 1
+
+    def _end_batch(self):
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_changes:
+            changes = self._batch_changes
+            self._batch_changes = dict()
+            self._emit_changes(changes)
+
+    def set_signal_rate(self, max_rate=None, params=None, debounce=False):
+        """ Limit the rate at which sig_param_changed is emitted. Changes
+        arriving in between emissions are merged, and the last value of
+        every parameter is always emitted.
+
+        :param max_rate: maximum number of emissions per second, None to
+            emit at every change
+        :param params: (optional) names of the parameters to limit, the
+            changes of all other parameters are emitted immediately
+        :param debounce: if True, emit only once the changes have stopped
+            for 1/max_rate seconds, instead of at most max_rate times per
+            second
+        """
+        self.flush_signal()
+        if max_rate is None:
+            self._signal_interval = None
+            return
+
+        self._signal_interval = int(round(1000 / max_rate))
+        self._signal_debounce = debounce
+        self._throttled_params = None if params is None else set(params)
+        if self._signal_timer is None:
+            self._signal_timer = QTimer(self)
+            self._signal_timer.setSingleShot(True)
+            self._signal_timer.timeout.connect(self._signal_timeout)
+
+    def flush_signal(self):
+        """ Emit immediately the changes held back by the rate limit.
+        """
+        if self._signal_timer is not None:
+            self._signal_timer.stop()
+        if self._pending_changes:
+            changes = self._pending_changes
+            self._pending_changes = dict()
+            self.sig_param_changed.emit(changes)
+
+    def _emit_changes(self, changes):
+        if self._lock is not None and QThread.currentThread() != self.thread():
+            self._sig_thread_changes.emit(changes)
+            return
+
+        if self._signal_interval is None:
+            self.sig_param_changed.emit(changes)
+            return
 
+        if self._throttled_params is not None:
+            immediate = {
+                k: v for k, v in changes.items() if k not in self._throttled_params
+            }
+            if immediate:
+                self.sig_param_changed.emit(immediate)
+            changes = {k: v for k, v in changes.items() if k in self._throttled_params}
+            if not changes:
+                return
 
-class ParametrizedWidget(Parametrized, QWidget):
+        self._pending_changes.update(changes)
+        if self._signal_debounce:
+            # wait for the changes to stop:
+            self._signal_timer.start(self._signal_interval)
+        elif not self._signal_timer.isActive():
+            # emit the first change at once and start the interval:
+            self._signal_timeout()
+
+    def _signal_timeout(self):
+        if self._pending_changes:
+            changes = self._pending_changes
+            self._pending_changes = dict()
+            self.sig_param_changed.emit(changes)
+            # changes coming before the interval elapses are held back:
+            if not self._signal_debounce:
+                self._signal_timer.start(self._signal_interval)
+
+
+class ParametrizedQt(ParamSignalMixin, Parametrized, QObject):
     sig_param_changed = pyqtSignal(dict)
+    _sig_thread_changes = pyqtSignal(dict)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.block_signal = False
+        self._init_signal()
 
-    def __setattr__(self, item, value):
-        super().__setattr__(item, value)
-        if hasattr(self, "params"):
-            try:
-                assert isinstance(self.__dict__[item], Param)
-                if not getattr(self, "block_signal", False):
-                    self.sig_param_changed.emit({item: value})
-            except (KeyError, AssertionError):
-                pass
+
+class ParametrizedWidget(ParamSignalMixin, Parametrized, QWidget):
+    sig_param_changed = pyqtSignal(dict)
+    _sig_thread_changes = pyqtSignal(dict)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_signal()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+""" Mirror of the numeric parameters of a ParameterTree in shared memory
+
+The mirror lets other processes read the current parameter values directly
+from a multiprocessing.shared_memory block, instead of receiving the
+serialized tree through queues whenever a parameter changes. Requires
+Python 3.8 or later.
+
+Example::
+
+    tree = ParameterTree()
+    ...
+    mirror = SharedTreeMirror(tree)
+    process = Process(target=worker, args=(mirror.layout,))
+
+    def worker(layout):
+        reader = SharedTreeReader(layout)
+        version = reader.version
+        while True:
+            if reader.version != version:
+                version = reader.version
+                exposure = reader["camera/exposure"]
+
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+import warnings
+
+# Sequence counter of the block, odd while the writer is updating it:
+_header = Struct("<Q")
+# Version of the last write of each value:
+_stamp = Struct("<Q")
+# Flag of the stamp of values which could not be written to the block:
+_INVALID = 1 << 63
+
+
+def shared_format(value):
+    """ Struct format used to store a parameter value in shared memory,
+    None if the value type is not supported.
+    """
+    if isinstance(value, bool):
+        return "<?"
+    if isinstance(value, int):
+        return "<q"
+    if isinstance(value, float):
+        return "<d"
+    if (
+        isinstance(value, tuple)
+        and len(value) == 2
+        and all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in value
+        )
+    ):
+        return "<dd"
+    return None
+
+
+class SharedTreeLayout:
+    """ Description of the shared memory block of a SharedTreeMirror, to be
+    passed to the processes that read it (it can be pickled).
+
+    :param shm_name: name of the shared memory block
+    :param entries: list of (path, struct format, offset) of the parameters
+    """
+
+    def __init__(self, shm_name, entries):
+        self.shm_name = shm_name
+        self.entries = entries
+
+
+class _SharedTreeBlock:
+    def __init__(self, shm, layout):
+        self.shm = shm
+        self.layout = layout
+        self.buf = shm.buf
+        self._slots = {
+            key: (Struct(fmt), offset) for key, fmt, offset in layout.entries
+        }
+
+    @property
+    def version(self):
+        """ Number of updates written to the block
+        """
+        return _header.unpack_from(self.buf, 0)[0] // 2
+
+    def keys(self):
+        return self._slots.keys()
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+class SharedTreeMirror(_SharedTreeBlock):
+    """ Writes the boolean, integer, float and range (pairs of numbers)
+    parameters of a tree to a new shared memory block, and keeps them up to
+    date as the parameters change.
+
+    The layout of the block is fixed at creation: parameters added to the
+    tree afterwards are not mirrored, and values keep the type they had.
+    Values which do not fit their slot (e.g. a float set to an integer
+    parameter) are not written: a warning is issued and readers get None
+    until the next valid value.
+
+    :param tree: the ParameterTree to mirror
+    :param name: (optional) name of the shared memory block
+    """
+
+    def __init__(self, tree, name=None):
+        entries = []
+        offset = _header.size
+        for key, param in tree._flat_index.items():
+            fmt = shared_format(param.value)
+            if fmt is None:
+                continue
+            entries.append((key, fmt, offset))
+            offset += _stamp.size + Struct(fmt).size
+
+        shm = SharedMemory(name=name, create=True, size=offset)
+        super().__init__(shm, SharedTreeLayout(shm.name, entries))
+        self.tree = tree
+        self._sequence = 0
+
+        self.write({key: tree._flat_index[key].value for key in self._slots.keys()})
+        tree.add_listener(self._param_changed)
+
+    def _param_changed(self, key, param):
+        if key in self._slots:
+            self.write({key: param.value})
+
+    def write(self, values):
+        """ Write values to the block, as a single update.
+
+        :param values: dictionary of parameter paths and values
+        """
+        buf = self.buf
+        # odd sequence number: readers wait for the end of the update
+        self._sequence += 1
+        _header.pack_into(buf, 0, self._sequence)
+        version = (self._sequence + 1) // 2
+        for key, value in values.items():
+            struct, offset = self._slots[key]
+            packed = _pack_values(struct.format, value)
+            if packed is None:
+                warnings.warn(
+                    f"The value {value!r} of {key} does not fit the format "
+                    f"{struct.format} of the shared memory block, and is "
+                    f"marked as invalid"
+                )
+                _stamp.pack_into(buf, offset, version | _INVALID)
+                continue
+            _stamp.pack_into(buf, offset, version)
+            struct.pack_into(buf, offset + _stamp.size, *packed)
+        self._sequence += 1
+        _header.pack_into(buf, 0, self._sequence)
+
+    def close(self):
+        """ Stop mirroring the tree and release the block. The block is
+        removed once all the processes reading it have closed it.
+        """
+        self.tree.remove_listener(self._param_changed)
+        super().close()
+        self.shm.unlink()
+
+
+class SharedTreeReader(_SharedTreeBlock):
+    """ Reads the parameters of a SharedTreeMirror, possibly from another
+    process, without any communication with the writing process.
+
+    :param layout: the layout attribute of the SharedTreeMirror
+    """
+
+    def __init__(self, layout):
+        super().__init__(SharedMemory(name=layout.shm_name), layout)
+
+    def _read(self, read_function):
+        # Retry if the writer updates the block while reading
+        buf = self.buf
+        while True:
+            sequence = _header.unpack_from(buf, 0)[0]
+            if sequence % 2 == 1:
+                continue
+            result = read_function(buf)
+            if _header.unpack_from(buf, 0)[0] == sequence:
+                return result
+
+    def __getitem__(self, key):
+        """ Value of a parameter, None if its last value could not be
+        written to the block (see SharedTreeMirror.write)
+        """
+        struct, offset = self._slots[key]
+        return self._read(lambda buf: _unpack_value(struct, buf, offset))
+
+    def values(self):
+        """ Flat dictionary with the current values of all the parameters
+        """
+        return self._read(
+            lambda buf: {
+                key: _unpack_value(struct, buf, offset)
+                for key, (struct, offset) in self._slots.items()
+            }
+        )
+
+    def changed_values(self, since):
+        """ Flat dictionary with the values written after a given version
+        """
+
+        def read_changed(buf):
+            changed = dict()
+            for key, (struct, offset) in self._slots.items():
+                if _stamp.unpack_from(buf, offset)[0] & ~_INVALID > since:
+                    changed[key] = _unpack_value(struct, buf, offset)
+            return changed
+
+        return self._read(read_changed)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _pack_values(fmt, value):
+    """ Values to pack with a struct format for a parameter value, None if
+    the value does not fit the format (e.g. a float in an integer slot,
+    which would otherwise be truncated).
+    """
+    if fmt == "<?":
+        return (value,) if isinstance(value, bool) else None
+    if fmt == "<q":
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if _is_number(value) and isinstance(value, int):
+            if -(2 ** 63) <= value < 2 ** 63:
+                return (value,)
+        return None
+    if fmt == "<d":
+        return (float(value),) if _is_number(value) else None
+    # ranges, also given as lists (e.g. read back from JSON):
+    try:
+        value = tuple(value)
+    except TypeError:
+        return None
+    if len(value) == 2 and all(_is_number(v) for v in value):
+        return value
+    return None
+
+
+def _unpack_value(struct, buf, offset):
+    if _stamp.unpack_from(buf, offset)[0] & _INVALID:
+        return None
+    value = struct.unpack_from(buf, offset + _stamp.size)
+    if len(value) == 1:
+        return value[0]
+    return value
@@ -0,0 +1,211 @@
+""" Streaming log of the state of a ParameterTree
+
+The log is a JSON Lines file. Its records are either full states of the
+tree (checkpoints)::
+
+    {"t": 1600000000.0, "state": {"camera/exposure": 1.0, ...}}
+
+or single parameter changes::
+
+    {"t": 1600000001.2, "key": "camera/exposure", "value": 2.0}
+
+where t is the time.time() of the change and the parameters are addressed
+by their paths in the flat format (see ParameterTree.serialize_flat). The
+byte offset of every checkpoint is stored with its time in an index file
+next to the log, so that the state at a given time can be found by reading
+only from the preceding checkpoint.
+
+Values are stored as JSON, so tuples are read back as lists, and paths
+(e.g. of folder parameters) as strings.
+"""
+
+from bisect import bisect_right
+import json
+import os
+from queue import Queue, Empty
+from threading import Thread
+import time
+
+
+def _to_json(value):
+    # Encoding of the values which are not supported by json
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    raise TypeError(f"{value!r} of type {type(value).__name__} cannot be logged")
+
+
+def _encode(record):
+    return (json.dumps(record, default=_to_json) + "\n").encode()
+
+
+def index_path(path):
+    """ Path of the checkpoint index of a log file
+    """
+    return str(path) + ".idx"
+
+
+class StateLogWriter:
+    """ Writes the initial state of a tree and all the following parameter
+    changes to a log file. The records are encoded and written by a
+    background thread, which flushes the file every flush_interval seconds,
+    and writes a checkpoint every checkpoint_every changes.
+
+    Changes to values which cannot be encoded are not logged, and the first
+    such error is raised by close().
+
+    :param tree: the ParameterTree to log
+    :param path: path of the log file, which is overwritten
+    :param checkpoint_every: number of changes between checkpoints
+    :param flush_interval: maximum time in seconds between file flushes
+    """
+
+    def __init__(self, tree, path, checkpoint_every=1000, flush_interval=1.0):
+        self.tree = tree
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.flush_interval = flush_interval
+
+        self._queue = Queue()
+        # The state is kept up to date by the writing thread,
+        # to write checkpoints without accessing the tree:
+        self._state = tree.serialize_flat()
+        self._n_changes = 0
+        # first error raised while writing the log:
+        self._error = None
+
+        self._file = open(path, "wb")
+        self._index_file = open(index_path(path), "wb")
+        self._write_checkpoint(time.time())
+
+        tree.add_listener(self._param_changed)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _param_changed(self, key, param):
+        self._queue.put((time.time(), key, param.value))
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except Empty:
+                record = False
+
+            if record is None:
+                break
+            if record:
+                try:
+                    self._write_change(*record)
+                except Exception as e:
+                    # keep logging the other changes, and report the
+                    # error when closing
+                    if self._error is None:
+                        self._error = e
+
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = now
+
+        self._flush()
+
+    def _write_change(self, t, key, value):
+        # encode first, so that a value which cannot be encoded does not
+        # get into the state written at checkpoints
+        line = _encode(dict(t=t, key=key, value=value))
+        self._state[key] = value
+        self._file.write(line)
+        self._n_changes += 1
+        if self._n_changes % self.checkpoint_every == 0:
+            self._write_checkpoint(t)
+
+    def _write_checkpoint(self, t):
+        line = _encode(dict(t=t, state=self._state))
+        self._index_file.write(_encode([t, self._file.tell()]))
+        self._file.write(line)
+
+    def _flush(self):
+        self._file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        """ Stop logging, write the pending records and close the files
+
+        :raises: the first error which occurred while writing the log
+        """
+        self.tree.remove_listener(self._param_changed)
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._index_file.close()
+        if self._error is not None:
+            raise self._error
+
+
+class StateLogReader:
+    """ Reads a log written by StateLogWriter
+
+    :param path: path of the log file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint_times = []
+        self.checkpoint_offsets = []
+        if os.path.exists(index_path(path)):
+            with open(index_path(path), "rb") as f:
+                for line in f:
+                    t, offset = json.loads(line)
+                    self.checkpoint_times.append(t)
+                    self.checkpoint_offsets.append(offset)
+        else:
+            self._scan_checkpoints()
+
+    def _scan_checkpoints(self):
+        with open(self.path, "rb") as f:
+            offset = f.tell()
+            for line in iter(f.readline, b""):
+                record = json.loads(line)
+                if "state" in record:
+                    self.checkpoint_times.append(record["t"])
+                    self.checkpoint_offsets.append(offset)
+                offset = f.tell()
+
+    def records(self, offset=0):
+        """ Iterate over the records of the log from a given byte offset
+        """
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                # skip a record which is still being written
+                if not line.endswith(b"\n"):
+                    break
+                yield json.loads(line)
+
+    def state_at(self, t):
+        """ State of the tree at time t, reconstructed from the last
+        checkpoint before t and the following changes.
+
+        :param t: time, as returned by time.time()
+        :return: flat dictionary of parameter paths and values
+        """
+        i_checkpoint = bisect_right(self.checkpoint_times, t) - 1
+        if i_checkpoint < 0:
+            raise ValueError(f"The log starts after {t}")
+
+        state = None
+        for record in self.records(self.checkpoint_offsets[i_checkpoint]):
+            if state is None:
+                state = dict(record["state"])
+                continue
+            if record["t"] > t:
+                break
+            if "key" in record:
+                state[record["key"]] = record["value"]
+        return state
+
+    def final_state(self):
+        """ Last state in the log
+        """
+        return self.state_at(float("inf"))
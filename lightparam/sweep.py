@@ -0,0 +1,361 @@
+""" Parameter sweeps stored as memory-mapped tables
+
+A sweep is a table with a row for each configuration and a column for each
+swept parameter, identified by its path in the flat format (see
+ParameterTree.serialize_flat). The columns are stored one after the other
+in a file, in the native byte order, typed after the value of the
+parameter in the tree:
+
+- booleans, integers and floats as packed 8-bit, 64-bit integer and double
+  values
+- ranges as pairs of 64-bit integers if both ends are integers, and as
+  pairs of doubles otherwise
+- any other value (e.g. the strings of a parameter with a list of choices)
+  as the index of the value in a list of distinct values, stored in the
+  header of the file as JSON, with the indices of the tuples, which are
+  restored when read
+
+The values of each column are checked against its type when the file is
+written.
+
+The file is memory-mapped when read, so that only the rows which are used
+are loaded, and a row is applied to a tree without building any nested
+dictionary.
+
+Example::
+
+    columns = product_columns({"camera/exposure": [1.0, 2.0, 5.0],
+                               "stimulus/mode": ["a", "b"]})
+    SweepTable.write("sweep.lps", tree, columns)
+    table = SweepTable("sweep.lps")
+    for i in range(len(table)):
+        table.apply_row(tree, i)
+        ...
+    table.close()
+
+"""
+
+from itertools import product
+import json
+import mmap
+from operator import gt
+from struct import Struct
+
+from lightparam.core import ValidationError
+
+MAGIC = b"LPSW"
+
+# magic and length of the JSON header
+_prefix = Struct("<4sI")
+
+# struct format and number of values per row of each kind of column
+_kinds = dict(
+    bool=("b", 1),
+    int=("q", 1),
+    float=("d", 1),
+    range=("d", 2),
+    int_range=("q", 2),
+    choice=("I", 1),
+)
+_range_kinds = ("range", "int_range")
+# what the values of each kind of column should be, for error messages
+_descriptions = dict(
+    bool="a boolean",
+    int="an integer",
+    float="a number",
+    range="a pair of numbers",
+    int_range="a pair of integers",
+)
+
+
+def column_kind(value):
+    """ Kind of the sweep table column for a parameter value
+    """
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if (
+        isinstance(value, tuple)
+        and len(value) == 2
+        and all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in value
+        )
+    ):
+        if all(isinstance(v, int) for v in value):
+            return "int_range"
+        return "range"
+    return "choice"
+
+
+def _number(value, integer):
+    # The value as stored in a column of integers or of floats, None if it
+    # cannot be stored there
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not integer:
+        return float(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            return None
+        value = int(value)
+    if not -(2 ** 63) <= value < 2 ** 63:
+        return None
+    return value
+
+
+def _column_values(key, kind, values):
+    # Values of a column which is not a choice column, flattened as they
+    # are packed
+    packed = []
+    for i_row, value in enumerate(values):
+        if kind == "bool":
+            items = (value,) if isinstance(value, bool) else None
+        elif kind in _range_kinds:
+            items = None
+            if isinstance(value, (tuple, list)) and len(value) == 2:
+                items = tuple(_number(v, kind == "int_range") for v in value)
+                if None in items:
+                    items = None
+        else:
+            number = _number(value, kind == "int")
+            items = None if number is None else (number,)
+        if items is None:
+            raise ValueError(
+                f"Row {i_row} of the column {key} is {value!r}, "
+                f"which is not {_descriptions[kind]}"
+            )
+        packed.extend(items)
+    return packed
+
+
+def _choice_indices(key, values, column):
+    # Indices of the values of a choice column in the list of its distinct
+    # values, which is stored in the column header
+    choices = dict()
+    indices = []
+    for i_row, value in enumerate(values):
+        try:
+            # distinct values, compared by their JSON encoding:
+            encoded = (isinstance(value, tuple), json.dumps(value))
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"Row {i_row} of the column {key} is {value!r}, "
+                f"which cannot be stored in a sweep table"
+            ) from None
+        indices.append(choices.setdefault(encoded, len(choices)))
+    column["choices"] = [json.loads(encoded) for _, encoded in choices.keys()]
+    column["tuples"] = [
+        i for i, (is_tuple, _) in enumerate(choices.keys()) if is_tuple
+    ]
+    return indices
+
+
+def product_columns(grid):
+    """ Columns of a sweep over all the combinations of parameter values
+
+    :param grid: dictionary of parameter paths and lists of their values
+    :return: dictionary of parameter paths and columns of values, with a
+        row for each combination
+    """
+    keys = list(grid.keys())
+    rows = list(product(*grid.values()))
+    return {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+
+
+class SweepTable:
+    """ Sweep table, memory-mapped from a file written by SweepTable.write
+
+    :param path: path of the file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _prefix.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a sweep table file")
+        header = json.loads(
+            self._mmap[_prefix.size : _prefix.size + header_length].decode()
+        )
+        self.n_rows = header["n_rows"]
+
+        buffer = memoryview(self._mmap)
+        self._columns = dict()
+        for column in header["columns"]:
+            fmt, width = _kinds[column["kind"]]
+            size = self.n_rows * width * Struct("=" + fmt).size
+            offset = _prefix.size + header_length + column["offset"]
+            choices = column.get("choices")
+            for i_choice in column.get("tuples", ()):
+                choices[i_choice] = tuple(choices[i_choice])
+            self._columns[column["key"]] = (
+                column["kind"],
+                buffer[offset : offset + size].cast(fmt),
+                choices,
+            )
+        buffer.release()
+
+    @staticmethod
+    def write(path, tree, columns):
+        """ Write a sweep table file
+
+        :param path: path of the file
+        :param tree: the ParameterTree the sweep applies to, whose current
+            values determine the types of the columns
+        :param columns: dictionary of parameter paths and sequences of
+            values, one for each row, e.g. as returned by product_columns
+        :raises ValueError: if the columns do not have the same number of
+            rows, or a value does not fit the type of its column
+        """
+        n_rows = None
+        header_columns = []
+        data = []
+        offset = 0
+        for key, values in columns.items():
+            values = list(values)
+            if n_rows is None:
+                n_rows = len(values)
+            elif len(values) != n_rows:
+                raise ValueError(
+                    f"The column {key} has {len(values)} rows instead of {n_rows}"
+                )
+
+            kind = column_kind(tree._flat_index[key].value)
+            fmt, width = _kinds[kind]
+            column = dict(key=key, kind=kind, offset=offset)
+            if kind == "choice":
+                values = _choice_indices(key, values, column)
+            else:
+                values = _column_values(key, kind, values)
+            column_data = Struct(f"={len(values)}{fmt}").pack(*values)
+            # keep the columns aligned to 8 bytes
+            column_data += bytes(-len(column_data) % 8)
+            header_columns.append(column)
+            data.append(column_data)
+            offset += len(column_data)
+
+        header = json.dumps(dict(n_rows=n_rows or 0, columns=header_columns))
+        header = header.encode()
+        header += b" " * (-(_prefix.size + len(header)) % 8)
+        with open(path, "wb") as f:
+            f.write(_prefix.pack(MAGIC, len(header)))
+            f.write(header)
+            for column_data in data:
+                f.write(column_data)
+
+    def __len__(self):
+        return self.n_rows
+
+    def keys(self):
+        return self._columns.keys()
+
+    def column(self, key):
+        """ Values of a column, as a memoryview of the mapped file. The
+        values of range columns are interleaved.
+        """
+        return self._columns[key][1]
+
+    def value(self, key, i_row):
+        """ Value of a parameter in a row
+        """
+        kind, column, choices = self._columns[key]
+        if kind in _range_kinds:
+            return tuple(column[2 * i_row : 2 * i_row + 2])
+        if kind == "bool":
+            return bool(column[i_row])
+        if kind == "choice":
+            return choices[column[i_row]]
+        return column[i_row]
+
+    def row(self, i_row):
+        """ Flat dictionary of the parameter values of a row
+        """
+        if not -self.n_rows <= i_row < self.n_rows:
+            raise IndexError(f"Row {i_row} is not in the sweep")
+        i_row %= self.n_rows
+        return {key: self.value(key, i_row) for key in self._columns.keys()}
+
+    def apply_row(self, tree, i_row):
+        """ Set the parameters of a tree to the values of a row
+
+        :param tree: the ParameterTree
+        :param i_row: index of the row
+        """
+        tree.deserialize_flat(self.row(i_row))
+
+    def validate(self, tree, max_violations=100):
+        """ Check all the values of the table against the limits of the
+        parameters of a tree (see Param.validate). Each column is checked
+        as a whole: numbers by their minimum and maximum, and the other
+        values by the distinct values in the column, so that only the rows
+        of invalid values are visited.
+
+        :param tree: the ParameterTree
+        :param max_violations: maximum number of invalid values reported
+            for each column
+        :raises ValidationError: listing the invalid values, with keys of
+            the form path[row]
+        """
+        violations = []
+        for key, (kind, column, choices) in self._columns.items():
+            param = tree._flat_index.get(key)
+            if param is None or param.limits is None or self.n_rows == 0:
+                continue
+
+            if kind == "choice":
+                invalid = []
+                for i_choice, choice in enumerate(choices):
+                    try:
+                        param.validate(choice)
+                    except ValueError:
+                        invalid.append(i_choice)
+                if not invalid:
+                    continue
+                rows = (i for i, c in enumerate(column) if c in invalid)
+            elif kind in _range_kinds and isinstance(param.limits, tuple):
+                lows, highs = column[::2], column[1::2]
+                if self._within(param.limits, lows, highs) and not any(
+                    map(gt, lows, highs)
+                ):
+                    continue
+                rows = range(self.n_rows)
+            elif kind in ("int", "float") and isinstance(param.limits, tuple):
+                if self._within(param.limits, column):
+                    continue
+                rows = range(self.n_rows)
+            else:
+                rows = range(self.n_rows)
+
+            n_column_violations = 0
+            for i_row in rows:
+                value = self.value(key, i_row)
+                try:
+                    param.validate(value)
+                except ValueError as e:
+                    violations.append((f"{key}[{i_row}]", value, str(e)))
+                    n_column_violations += 1
+                    if n_column_violations == max_violations:
+                        break
+        if violations:
+            raise ValidationError(violations)
+
+    @staticmethod
+    def _within(limits, *columns):
+        minimum, maximum = limits[:2]
+        return all(
+            (minimum is None or min(column) >= minimum)
+            and (maximum is None or max(column) <= maximum)
+            for column in columns
+        )
+
+    def close(self):
+        """ Release the mapped file
+        """
+        for _, column, _ in self._columns.values():
+            column.release()
+        self._columns = dict()
+        self._mmap.close()
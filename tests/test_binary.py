@@ -0,0 +1,91 @@
+import json
+import unittest
+
+from lightparam import Parametrized, Param, ParameterTree
+from lightparam.binary import (
+    encode,
+    decode,
+    decode_header,
+    serialize_binary,
+    deserialize_binary,
+)
+
+
+class BinaryParametrized(Parametrized):
+    def __init__(self, name, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1)
+        self.a_float = Param(1.0, (-1.0, 10.0))
+        self.a_str = Param("strstr")
+        self.a_list = Param("a", ["a", "b", "c"])
+        self.a_bool = Param(False)
+        self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+        self.an_int_range = Param((1, 3), (0, 10))
+        self.a_dict = Param(dict(x=[1, 2]), gui=False)
+        self.a_none = Param(None)
+
+
+class TestBinary(unittest.TestCase):
+    def testRoundTrip(self):
+        tree = ParameterTree()
+        BinaryParametrized("a/p1", tree=tree)
+        BinaryParametrized("a/p2", tree=tree)
+        data = serialize_binary(tree)
+        assert decode(data, tree) == tree.serialize_flat()
+        assert decode_header(data) == (tree.version, False)
+
+        other_tree = ParameterTree()
+        p1 = BinaryParametrized("a/p1", tree=other_tree)
+        BinaryParametrized("a/p2", tree=other_tree)
+        p1.a_str = "ü"
+        p1.a_range = (0.0, 0.25)
+        p1.a_dict = dict(y=1)
+        p1.an_int = 2 ** 70
+        deserialize_binary(tree, serialize_binary(other_tree))
+        assert tree.serialize() == other_tree.serialize()
+        assert isinstance(tree.tracked["a/p1"].a_range, tuple)
+
+        self.assertRaises(ValueError, decode, b"\0" * 64)
+        assert decode(encode(dict())) == dict()
+
+        # data without a tree is self-describing
+        flat = tree.serialize_flat()
+        assert decode(encode(flat)) == flat
+        deserialize_binary(other_tree, encode(flat))
+
+        # data indexed by the schema needs a tree with the same parameters
+        self.assertRaises(ValueError, decode, data)
+        different_tree = ParameterTree()
+        BinaryParametrized("a/p1", tree=different_tree)
+        self.assertRaises(ValueError, deserialize_binary, different_tree, data)
+
+    def testDelta(self):
+        tree = ParameterTree()
+        p1 = BinaryParametrized("a/p1", tree=tree)
+        p2 = BinaryParametrized("b/p2", tree=tree)
+        version = tree.version
+        p1.a_float = 3.0
+        p2.a_str = "changed"
+        delta = serialize_binary(tree, since=version)
+        assert decode_header(delta) == (tree.version, True)
+        assert decode(delta, tree) == {"a/p1/a_float": 3.0, "b/p2/a_str": "changed"}
+        # the parameters are stored as indices, not paths
+        assert b"a_float" not in delta
+        assert len(delta) < len(json.dumps(tree.serialize(since=version)))
+
+        other_tree = ParameterTree()
+        o1 = BinaryParametrized("a/p1", tree=other_tree)
+        o2 = BinaryParametrized("b/p2", tree=other_tree)
+        deserialize_binary(other_tree, delta)
+        assert o1.a_float == 3.0 and o2.a_str == "changed"
+        assert other_tree.serialize() == tree.serialize()
+
+        # parameters added after the delta was made keep the indices valid
+        # but change the schema
+        p1.new_param = Param(0)
+        self.assertRaises(ValueError, decode, delta, tree)
+        assert decode(serialize_binary(tree, since=version), tree) == {
+            "a/p1/a_float": 3.0,
+            "b/p2/a_str": "changed",
+            "a/p1/new_param": 0,
+        }
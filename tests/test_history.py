@@ -0,0 +1,97 @@
+import unittest
+
+from lightparam import Parametrized, Param, ParameterTree
+from lightparam.history import ParameterHistory
+
+
+class HistoryParametrized(Parametrized):
+    def __init__(self, name, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1)
+        self.a_float = Param(1.0, (-1.0, 10.0))
+
+
+class TestHistory(unittest.TestCase):
+    def testUndoRedo(self):
+        tree = ParameterTree()
+        p1 = HistoryParametrized("a/p1", tree=tree)
+        p2 = HistoryParametrized("b/p2", tree=tree)
+        history = ParameterHistory(tree, coalesce_interval=0)
+        assert not history.can_undo
+
+        p1.an_int = 2
+        p2.a_float = 2.0
+        p1.an_int = 3
+        assert history.version == 3
+
+        history.undo()
+        assert p1.an_int == 2 and p2.a_float == 2.0
+        history.undo()
+        assert p1.an_int == 2 and p2.a_float == 1.0
+        history.redo()
+        assert p2.a_float == 2.0
+
+        history.jump(0)
+        assert p1.an_int == 1 and p2.a_float == 1.0
+        history.jump(3)
+        assert p1.an_int == 3 and p2.a_float == 2.0
+
+        history.jump(1)
+        p2.an_int = 5
+        assert history.version == 2 and history.last_version == 2
+        assert not history.can_redo
+        history.undo()
+        assert p2.an_int == 1 and p1.an_int == 2
+
+        with self.assertRaises(ValueError):
+            history.jump(3)
+        history.close()
+
+    def testCoalesce(self):
+        tree = ParameterTree()
+        p1 = HistoryParametrized("a/p1", tree=tree)
+        history = ParameterHistory(tree, coalesce_interval=60)
+        for i in range(10):
+            p1.a_float = float(i)
+        assert history.version == 1
+        p1.an_int = 4
+        p1.a_float = 2.5
+        assert history.version == 3
+        history.jump(1)
+        assert p1.a_float == 9.0 and p1.an_int == 1
+        history.undo()
+        assert p1.a_float == 1.0
+
+    def testBounded(self):
+        tree = ParameterTree()
+        p1 = HistoryParametrized("a/p1", tree=tree)
+        history = ParameterHistory(tree, max_entries=5, coalesce_interval=0)
+        for i in range(20):
+            p1.an_int = i + 2
+        assert history.first_version == 15
+        assert history.last_version == 20
+        history.jump(15)
+        assert p1.an_int == 16
+        assert not history.can_undo
+
+        history = ParameterHistory(tree, max_bytes=1000, coalesce_interval=0)
+        for i in range(100):
+            p1.a_float = float(i)
+        assert 0 < history.last_version - history.first_version < 100
+        assert history._n_bytes <= 1000
+
+    def testAddedNode(self):
+        tree = ParameterTree()
+        p1 = HistoryParametrized("a/p1", tree=tree)
+        history = ParameterHistory(tree, coalesce_interval=0)
+        p1.an_int = 2
+        p2 = HistoryParametrized("b/p2", tree=tree)
+        assert history.version == 1
+        p2.an_int = 3
+        p1.params.an_int.changed = True
+        assert history.version == 2
+        history.undo()
+        history.undo()
+        assert p2.an_int == 1 and p1.an_int == 1
+        history.redo()
+        assert p1.an_int == 2
@@ -1,6 +1,16 @@
 import unittest
+from threading import Thread
 
-from lightparam import Parametrized, Param, ParameterTree
+from lightparam import (
+    Parametrized,
+    Param,
+    ParameterTree,
+    TreeSnapshot,
+    ValidationError,
+    get_nested,
+    set_nested,
+    visit_dict,
+)
 
 
 class TestBasic(unittest.TestCase):
@@ -26,6 +36,184 @@ class TestBasic(unittest.TestCase):
         assert tc.params.x.value == 3.0
         assert tc.params["x"].value == 3.0
 
+    def testParamsBeforeInit(self):
+        class TC(Parametrized):
+            def __init__(self):
+                self.x = Param(1.0)
+                self.x = 2.0
+                self.label = "a"
+                super().__init__(name="tc")
+                self.y = Param(3)
+
+        tc = TC()
+        assert tc.x == 2.0
+        assert tc.label == "a"
+        assert list(tc.params.keys()) == ["x", "y"]
+        assert tc.params.x.parametrized is tc
+        tc.x = 4.0
+        assert tc.params.x.value == 4.0
+        tree = ParameterTree()
+        tree.add(tc)
+        assert tree.serialize() == {"tc": {"x": 4.0, "y": 3}}
+
+    def testAttributeAccess(self):
+        class TC(Parametrized):
+            def __init__(self):
+                super().__init__()
+                self.x = Param(1.0, (0.0, 2.0))
+                self.not_a_param = [1, 2]
+
+        tc = TC()
+        assert tc.not_a_param == [1, 2]
+        assert "not_a_param" not in tc.params.items()
+        tc.params.x.value = 1.5
+        assert tc.x == 1.5
+        tc.x = Param(0.5, (0.0, 1.0))
+        assert tc.x == 0.5
+        assert tc.params.x.limits == (0.0, 1.0)
+        tc.params.values = dict(x=0.7)
+        assert tc.x == 0.7
+
+    def testContainer(self):
+        class TC(Parametrized):
+            def __init__(self):
+                super().__init__()
+                self.x = Param(1.0)
+                self.buffer = list(range(100))
+                self.y = Param("a")
+
+        tc = TC()
+        items = tc.params.items()
+        assert list(items) == ["x", "y"]
+        assert [k for k, _ in tc.params] == ["x", "y"]
+        assert len(tc.params) == 2
+        assert "y" in tc.params and "buffer" not in tc.params
+        tc.z = Param(3)
+        assert "z" in items
+        assert tc.params.values == dict(x=1.0, y="a", z=3)
+
+    def testBatch(self):
+        class TC(Parametrized):
+            def __init__(self):
+                super().__init__()
+                self.batches = []
+                self.x = Param(1.0)
+                self.y = Param(2)
+
+            def _end_batch(self):
+                self.batches.append(self.params.changed_values())
+
+        tc = TC()
+        tc.params.acknowledge_changes()
+        tc.params.update(dict(x=3.0, y=4))
+        assert tc.x == 3.0 and tc.y == 4
+        assert tc.batches == [dict(x=3.0, y=4)]
+        with self.assertRaises(KeyError):
+            tc.params.update(dict(x=0.0, z=1))
+        assert tc.x == 3.0
+
+    def testThreadSafe(self):
+        class TC(Parametrized):
+            def __init__(self):
+                super().__init__(thread_safe=True)
+                self.x = Param(0)
+                self.y = Param(0)
+
+        tc = TC()
+        snapshot = tc.params.snapshot()
+        assert snapshot == dict(x=0, y=0)
+        assert tc.params.snapshot() is snapshot
+        with self.assertRaises(TypeError):
+            snapshot["x"] = 1
+
+        def write(start):
+            for i in range(start, start + 1000):
+                with tc.params.batch():
+                    tc.x = i
+                    tc.y = i
+
+        def read(inconsistent):
+            for _ in range(1000):
+                snapshot = tc.params.snapshot()
+                if snapshot["x"] != snapshot["y"]:
+                    inconsistent.append(snapshot)
+
+        inconsistent = []
+        threads = [Thread(target=write, args=(i * 1000,)) for i in range(4)]
+        threads += [Thread(target=read, args=(inconsistent,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert inconsistent == []
+        assert tc.params.snapshot()["x"] == tc.x
+
+        assert tc.params.pop_changed_values() == dict(x=tc.x, y=tc.y)
+        assert tc.params.changed_values() == dict()
+
+    def testClassParams(self):
+        class Base(Parametrized):
+            x = Param(1.0, (0.0, 10.0))
+            s = Param("a", ["a", "b"])
+
+        class TC(Base):
+            y = Param(2)
+
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.s = Param("b", ["a", "b", "c"])
+                self.z = Param(True)
+
+        assert [name for name, _ in TC._schema] == ["x", "s", "y"]
+        tree = ParameterTree()
+        t1 = TC(name="t1", tree=tree)
+        t2 = TC(name="t2", tree=tree)
+        t1.x = 3.0
+        assert t1.x == 3.0 and t2.x == 1.0
+        assert t1.params.x is not t2.params.x
+        assert t1.params.x.gui == "spin" and t1.params.s.gui == "combo"
+        assert t1.params.s.limits == ["a", "b", "c"]
+        assert TC.s.limits == ["a", "b"]
+        assert list(t1.params.keys()) == ["x", "s", "y", "z"]
+        assert tree.serialize()["t2"] == dict(x=1.0, s="b", y=2, z=True)
+        assert not hasattr(t1.params.x, "__dict__")
+
+    def testLimits(self):
+        class TC(Parametrized):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.x = Param(1.0, (0.0, 10.0))
+                self.n = Param(2, [1, 2, 3])
+                self.r = Param((1.0, 2.0), (0.0, 5.0))
+                self.free = Param(1.0)
+
+        # not enforced by default
+        tc = TC()
+        tc.x = 20.0
+        assert tc.x == 20.0
+
+        tc = TC(enforce_limits="raise")
+        tc.x = 5.0
+        tc.n = "3"
+        assert tc.n == 3
+        tc.free = -100.0
+        for name, value in [("x", 20.0), ("n", 4), ("r", (3.0, 1.0)), ("x", "a")]:
+            with self.assertRaises(ValidationError):
+                setattr(tc, name, value)
+        assert tc.x == 5.0 and tc.r == (1.0, 2.0)
+        with self.assertRaises(ValidationError):
+            tc.params.x.value = 99.0
+        assert tc.x == 5.0 and tc.params.x.value == 5.0
+
+        tc = TC(enforce_limits="clamp")
+        tc.x = -1.0
+        tc.r = (-1.0, 10.0)
+        assert tc.x == 0.0 and tc.r == (0.0, 5.0)
+        tc.params.x.value = 50.0
+        assert tc.x == 10.0
+        with self.assertRaises(ValidationError):
+            tc.n = 4
+
 
 class TestTree(unittest.TestCase):
     def testConstruct(self):
@@ -54,6 +242,313 @@ class TestTree(unittest.TestCase):
         tree.deserialize(dict1)
         assert dict1 == tree.serialize()
 
+    def testDeserialize(self):
+        class TestParametrized(Parametrized):
+            def __init__(self, name, **kwargs):
+                super().__init__(name=name, **kwargs)
+                self.an_int = Param(1)
+                self.fixed = Param(1.0, loadable=False)
+
+        tree = ParameterTree()
+        p1 = TestParametrized("a", tree=tree)
+        p2 = TestParametrized("a/b/p2", tree=tree)
+        tree.deserialize(
+            dict(a=dict(an_int=2, fixed=2.0, b=dict(p2=dict(an_int=3, fixed=3.0))))
+        )
+        assert p1.an_int == 2 and p2.an_int == 3
+        assert p1.fixed == 1.0 and p2.fixed == 1.0
+
+        with self.assertWarns(UserWarning):
+            tree.deserialize(dict(a=dict(b=dict(p2=dict(missing=1)))))
+        with self.assertWarns(UserWarning):
+            tree.deserialize(dict(c=dict(an_int=1)))
+
+        nodes = {
+            path: (node, entries)
+            for path, node, entries in tree.visit_nodes(
+                dict(a=dict(an_int=1, b=dict(p2=dict(an_int=2))), c=dict(x=1))
+            )
+        }
+        assert nodes[("a",)] == (p1, dict(an_int=1))
+        assert nodes[("a", "b", "p2")] == (p2, dict(an_int=2))
+        assert nodes[()] == (None, dict(c=dict(x=1)))
+
+    def testChanged(self):
+        class TestParametrized(Parametrized):
+            def __init__(self, name, **kwargs):
+                super().__init__(name=name, **kwargs)
+                self.an_int = Param(1)
+                self.a_float = Param(1.0)
+
+        tree = ParameterTree()
+        p1 = TestParametrized("a/p1", tree=tree)
+        p2 = TestParametrized("a/b/p2", tree=tree)
+        p3 = TestParametrized("p3")
+        tree.add(p3)
+        assert tree.changed_values() == tree.serialize()
+        tree.acknowledge_changes()
+        assert tree.changed_values() == {}
+        assert p1.params.changed_values() == {}
+
+        p2.a_float = 2.0
+        p2.an_int = 1
+        assert p2.params.changed_values() == dict(a_float=2.0)
+        assert tree.changed_values() == dict(a=dict(b=dict(p2=dict(a_float=2.0))))
+
+        p1.params.an_int.changed = True
+        assert tree.changed_values() == dict(
+            a=dict(p1=dict(an_int=1), b=dict(p2=dict(a_float=2.0)))
+        )
+        p2.params.acknowledge_changes()
+        assert tree.changed_values() == dict(a=dict(p1=dict(an_int=1)))
+        tree.acknowledge_changes()
+        assert tree.changed_values() == {}
+        assert not p1.params.an_int.changed
+
+    def testDelta(self):
+        class TestParametrized(Parametrized):
+            def __init__(self, name, **kwargs):
+                super().__init__(name=name, **kwargs)
+                self.an_int = Param(1)
+                self.a_float = Param(1.0)
+
+        tree = ParameterTree()
+        p1 = TestParametrized("a/p1", tree=tree)
+        p2 = TestParametrized("a/b/p2", tree=tree)
+        assert tree.serialize(since=0) == tree.serialize()
+
+        v0 = tree.version
+        full = tree.serialize()
+        assert tree.serialize(since=v0) == {}
+        p1.an_int = 2
+        v1 = tree.version
+        p2.a_float = 3.0
+        p1.an_int = 3
+        assert tree.serialize(since=v1) == dict(
+            a=dict(p1=dict(an_int=3), b=dict(p2=dict(a_float=3.0)))
+        )
+        delta = tree.serialize(since=v0)
+
+        tree.deserialize(full)
+        assert p1.an_int == 1 and p2.a_float == 1.0
+        tree.deserialize(delta)
+        assert p1.an_int == 3 and p2.a_float == 3.0
+
+        p3 = TestParametrized("c")
+        v2 = tree.version
+        tree.add(p3)
+        assert tree.serialize(since=v2) == dict(c=dict(an_int=1, a_float=1.0))
+
+        # writes through params.values and Param.value are versioned too
+        snapshot = tree.snapshot()
+        v3 = tree.version
+        p3.params.values = dict(an_int=7)
+        assert tree.serialize(since=v3) == dict(c=dict(an_int=7))
+        v4 = tree.version
+        p3.params.a_float.value = 5.0
+        assert tree.serialize(since=v4) == dict(c=dict(a_float=5.0))
+        assert tree.snapshot().serialize()["c"] == dict(an_int=7, a_float=5.0)
+        assert snapshot.serialize()["c"] == dict(an_int=1, a_float=1.0)
+        v5 = tree.version
+        p3.params.a_float.value = 5.0
+        assert tree.version == v5
+
+        # params added one after the other, with versions taken in between
+        tree = ParameterTree()
+        node = Parametrized("n", tree=tree)
+        node.a = Param(1)
+        va = tree.version
+        node.b = Param(2)
+        node.c = Param(3)
+        assert tree.serialize_flat(since=va) == {"n/b": 2, "n/c": 3}
+        other = Parametrized("o", tree=tree)
+        other.x = Param(0)
+        vx = tree.version
+        node.d = Param(4)
+        assert tree.serialize_flat(since=vx) == {"n/d": 4}
+        assert tree.serialize_flat(since=va) == {
+            "n/b": 2,
+            "n/c": 3,
+            "o/x": 0,
+            "n/d": 4,
+        }
+        node.a = 5
+        assert tree.serialize_flat(since=vx) == {"n/d": 4, "n/a": 5}
+        assert tree.serialize(since=0) == tree.serialize()
+
+    def testFlat(self):
+        class TestParametrized(Parametrized):
+            def __init__(self, name, **kwargs):
+                super().__init__(name=name, **kwargs)
+                self.an_int = Param(1)
+                self.fixed = Param(1.0, loadable=False)
+
+        tree = ParameterTree()
+        p1 = TestParametrized("a", tree=tree)
+        p2 = TestParametrized("a/b/p2", tree=tree)
+        p2.extra = Param("x")
+        flat = tree.serialize_flat()
+        assert flat == {
+            "a/an_int": 1,
+            "a/fixed": 1.0,
+            "a/b/p2/an_int": 1,
+            "a/b/p2/fixed": 1.0,
+            "a/b/p2/extra": "x",
+        }
+        v0 = tree.version
+        p1.an_int = 5
+        assert tree.serialize_flat(since=v0) == {"a/an_int": 5}
+
+        tree.deserialize_flat({"a/b/p2/an_int": 3, "a/fixed": 3.0})
+        assert p2.an_int == 3 and p1.fixed == 1.0
+        tree.deserialize_flat(flat)
+        assert tree.serialize_flat() == flat
+        with self.assertWarns(UserWarning):
+            tree.deserialize_flat({"a/missing": 1})
+
+    def testReplace(self):
+        tree = ParameterTree()
+        old = Parametrized("proto", tree=tree)
+        old.x = Param(1)
+        old.old = Param(2)
+        new = Parametrized("proto")
+        new.x = Param(5)
+        changes = []
+        tree.add_listener(lambda key, param: changes.append(key))
+
+        v0 = tree.version
+        tree.add(new)
+        assert tree.tracked["proto"] is new
+        assert tree.serialize() == {"proto": {"x": 5}}
+        assert tree.serialize_flat() == {"proto/x": 5}
+        assert tree.serialize_flat(since=0) == {"proto/x": 5}
+
+        # the replaced node is not tracked anymore
+        v1 = tree.version
+        old.x = 100
+        assert tree.version == v1
+        assert tree.serialize(since=v0) == {"proto": {"x": 5}}
+        assert changes == ["proto/x"]
+
+        # adding a node again has no effect
+        tree.add(new)
+        assert new._trees == [tree]
+        v2 = tree.version
+        new.x = 6
+        assert tree.version == v2 + 1
+        assert changes == ["proto/x", "proto/x"]
+
+    def testValidate(self):
+        class TC(Parametrized):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.x = Param(1.0, (0.0, 10.0))
+                self.s = Param("a", ["a", "b"])
+
+        tree = ParameterTree()
+        TC(name="a/b", tree=tree)
+        TC(name="c", tree=tree)
+        state = dict(a=dict(b=dict(x=20.0, s="c")), c=dict(x=-1.0, s="b", other=1))
+        with self.assertRaises(ValidationError) as raised:
+            tree.validate(state)
+        assert sorted(v[0] for v in raised.exception.violations) == [
+            "a/b/s",
+            "a/b/x",
+            "c/x",
+        ]
+
+        state["a"]["b"]["s"] = "a"
+        assert tree.validate(state, clamp=True) == dict(
+            a=dict(b=dict(x=10.0, s="a")), c=dict(x=0.0, s="b", other=1)
+        )
+        assert tree.validate_flat({"a/b/x": 3.0, "c/s": "a"}) == {
+            "a/b/x": 3.0,
+            "c/s": "a",
+        }
+        with self.assertRaises(ValidationError) as raised:
+            tree.validate_flat({"a/b/x": 30.0, "c/s": "z", "c/x": 3.0})
+        assert len(raised.exception.violations) == 2
+
+        # restoring to objects enforcing the limits checks all the values
+        # before setting any
+        enforced = TC(name="d/e", tree=tree, enforce_limits="raise")
+        enforced.block_signal = False
+        for restore, state in [
+            (tree.deserialize, dict(d=dict(e=dict(x=2.0, s="z")), c=dict(x=20.0))),
+            (tree.deserialize_flat, {"d/e/x": 2.0, "d/e/s": "z", "c/x": 20.0}),
+        ]:
+            with self.assertRaises(ValidationError) as raised:
+                restore(state)
+            assert raised.exception.violations == [
+                ("d/e/s", "z", "is not one of ['a', 'b']")
+            ]
+            assert enforced.x == 1.0 and tree.tracked["c"].x != 20.0
+            assert enforced.block_signal is False
+
+        with self.assertRaises(ValidationError) as raised:
+            enforced.x = 11.0
+        assert raised.exception.violations[0][0] == "d/e/x"
+
+    def testSnapshot(self):
+        class TestParametrized(Parametrized):
+            def __init__(self, name, **kwargs):
+                super().__init__(name=name, **kwargs)
+                self.an_int = Param(1)
+                self.a_float = Param(1.0)
+
+        tree = ParameterTree()
+        p1 = TestParametrized("a/p1", tree=tree)
+        p2 = TestParametrized("a/b/p2", tree=tree)
+        s0 = tree.snapshot()
+        assert isinstance(s0, TreeSnapshot)
+        assert tree.snapshot() is s0
+        assert s0.serialize() == tree.serialize()
+        assert s0.serialize_flat() == tree.serialize_flat()
+
+        p1.an_int = 2
+        s1 = tree.snapshot()
+        assert s1 is not s0
+        assert s1.nodes["a/b/p2"] is s0.nodes["a/b/p2"]
+        assert s0.nodes["a/p1"]["an_int"] == 1
+        assert s1.nodes["a/p1"]["an_int"] == 2
+
+        p2.a_float = 3.0
+        p2.a_float = 1.0
+        s2 = tree.snapshot()
+        assert s0.diff(s2) == {"a/p1/an_int": 2}
+        assert s2.diff(s0) == {"a/p1/an_int": 1}
+        assert s1.diff(s2) == {}
+
+        tree.deserialize_flat(s2.diff(s0))
+        assert tree.snapshot().serialize() == s0.serialize()
+
+
+class TestNested(unittest.TestCase):
+    def testNested(self):
+        d = dict(a=dict(a0=0, a1=1), b=2)
+        assert list(visit_dict(d)) == [
+            (("a", "a0"), 0),
+            (("a", "a1"), 1),
+            (("b",), 2),
+        ]
+        assert get_nested(d, ["a", "a1"]) == 1
+        assert get_nested(d, ("c", "c0")) == {}
+        set_nested(d, ("a", "a2", "new_entry"), 2)
+        assert d["a"]["a2"] == dict(new_entry=2)
+        assert list(visit_dict(dict(), ["x"])) == []
+        assert list(visit_dict(d, ["x"]))[:2] == [
+            (("x", "a", "a0"), 0),
+            (("x", "a", "a1"), 1),
+        ]
+        assert list(visit_dict(dict(a=dict(), b=dict(c=1)))) == [(("b", "c"), 1)]
+
+    def testDeep(self):
+        d = dict()
+        path = [f"level_{i}" for i in range(5000)]
+        set_nested(d, path, 1)
+        assert get_nested(d, path) == 1
+        assert list(visit_dict(d)) == [(tuple(path), 1)]
+
 
 class TestParamFunc(unittest.TestCase):
     def testFunc(self):
@@ -63,3 +558,8 @@ class TestParamFunc(unittest.TestCase):
         p = Parametrized(params=paramfunc)
         assert p.x == 0.5
         assert p.y == "ABCDF"
+
+        p2 = Parametrized(params=paramfunc)
+        p2.x = 1.0
+        assert p.x == 0.5
+        assert p2.x == 1.0
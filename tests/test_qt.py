@@ -0,0 +1,468 @@
+import os
+import threading
+import unittest
+from functools import partial
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PyQt5.QtCore import QCoreApplication, QEvent, QModelIndex, QPointF, Qt
+    from PyQt5.QtGui import QMouseEvent
+    from PyQt5.QtTest import QTest
+    from PyQt5.QtWidgets import QApplication, QStyleOptionViewItem, QWidget
+except ImportError:
+    QApplication = None
+
+from lightparam import Parametrized, Param, ParameterTree
+
+if QApplication is not None:
+    from lightparam.param_qt import ParametrizedQt
+    from lightparam.gui import ParameterGui, ParameterTreeGui
+    from lightparam.gui.collapsible_widget import CollapsibleWidget
+    from lightparam.gui.precisionslider import (
+        SliderWidgetWithNumbers,
+        RangeSliderWidgetWithNumbers,
+    )
+    from lightparam.gui.qt_parametergui import gui_map
+    from lightparam.gui.table_view import (
+        ParameterTableModel,
+        ParameterDelegate,
+        ParameterTableGui,
+    )
+
+    class SignalParametrized(ParametrizedQt):
+        def __init__(self, name="p", **kwargs):
+            super().__init__(name=name, **kwargs)
+            self.an_int = Param(1, (0, 100))
+            self.a_float = Param(1.0, (-1.0, 10.0))
+            self.a_range = Param((0.2, 0.6), (0.0, 1.0))
+
+    def move_event(x, y):
+        return QMouseEvent(
+            QEvent.MouseMove, QPointF(x, y), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier
+        )
+
+
+class GuiParametrized(Parametrized):
+    def __init__(self, name="p", **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1, (0, 100))
+        self.a_float = Param(1.0, (-1.0, 10.0))
+        self.a_bool = Param(False)
+
+
+class TableParametrized(Parametrized):
+    def __init__(self, name="p", **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.a_float = Param(1.5, (0.0, 10.0), unit="dB", desc="gain")
+        self.an_int = Param(3, (0, 10))
+        self.a_bool = Param(False)
+        self.a_list = Param("a", ["a", "b"])
+        self.a_str = Param("text")
+        self.a_folder = Param("", gui="folder")
+        self.a_button = Param(False, gui="button")
+        self.a_slider = Param(0.5, (0.0, 1.0), gui="slider")
+        self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+        self.fixed = Param(1.0, editable=False)
+        self.str_pair = Param(("a", "b"), gui=False)
+        self.open_range = Param((1, None), gui=False)
+
+
+# interval between emissions for the rate limited tests, in ms
+INTERVAL = 50
+
+
+@unittest.skipIf(QApplication is None, "PyQt5 is not installed")
+class TestQt(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def emissions(self, parametrized):
+        emitted = []
+        parametrized.sig_param_changed.connect(emitted.append)
+        return emitted
+
+    def testSignal(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        p.an_int = 2
+        p.a_float = 3.0
+        assert emitted == [{"an_int": 2}, {"a_float": 3.0}]
+
+        p.block_signal = True
+        p.an_int = 3
+        p.block_signal = False
+        assert len(emitted) == 2
+
+    def testClampedSignal(self):
+        p = SignalParametrized(enforce_limits="clamp")
+        emitted = self.emissions(p)
+        p.a_float = 50.0
+        with p.params.batch():
+            p.an_int = -5
+        assert p.a_float == 10.0 and p.an_int == 0
+        assert emitted == [{"a_float": 10.0}, {"an_int": 0}]
+
+    def testThreads(self):
+        p = SignalParametrized(thread_safe=True)
+        received = []
+        p.sig_param_changed.connect(
+            lambda changes: received.append((changes, threading.get_ident()))
+        )
+
+        def write():
+            p.an_int = 5
+            with p.params.batch():
+                p.a_float = 2.0
+                p.an_int = 6
+
+        worker = threading.Thread(target=write)
+        worker.start()
+        worker.join()
+        # the changes are queued to the thread the object lives in
+        assert received == []
+        QTest.qWait(INTERVAL)
+        main = threading.get_ident()
+        assert received == [
+            ({"an_int": 5}, main),
+            ({"a_float": 2.0, "an_int": 6}, main),
+        ]
+        assert p.an_int == 6
+
+        # changes from the owner thread are still emitted directly
+        p.an_int = 7
+        assert received[-1] == ({"an_int": 7}, main)
+
+    def testBatch(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        with p.params.batch():
+            p.an_int = 2
+            p.a_float = 3.0
+            p.an_int = 4
+            with p.params.batch():
+                p.a_float = 5.0
+            assert emitted == []
+        assert emitted == [{"an_int": 4, "a_float": 5.0}]
+
+        p.params.update(dict(an_int=6, a_float=7.0))
+        p.params.values = dict(an_int=8)
+        assert emitted[1:] == [{"an_int": 6, "a_float": 7.0}, {"an_int": 8}]
+
+    def testThrottle(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        p.set_signal_rate(1000 / INTERVAL)
+        # the first change is emitted at once, the following are merged
+        # until the interval elapses:
+        p.an_int = 2
+        p.an_int = 3
+        p.a_float = 2.0
+        p.an_int = 4
+        assert emitted == [{"an_int": 2}]
+        QTest.qWait(3 * INTERVAL)
+        assert emitted == [{"an_int": 2}, {"an_int": 4, "a_float": 2.0}]
+        # the last values are emitted exactly once
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 2
+
+        # back to emitting every change
+        p.an_int = 5
+        p.set_signal_rate(None)
+        p.an_int = 6
+        assert emitted[2:] == [{"an_int": 5}, {"an_int": 6}]
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 4
+
+    def testDebounce(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        p.set_signal_rate(1000 / INTERVAL, debounce=True)
+        for i in range(5):
+            p.an_int = i
+            QTest.qWait(INTERVAL // 5)
+        assert emitted == []
+        QTest.qWait(3 * INTERVAL)
+        assert emitted == [{"an_int": 4}]
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 1
+
+    def testThrottledParams(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        p.set_signal_rate(1000 / INTERVAL, params=["an_int"])
+        p.an_int = 2
+        p.an_int = 3
+        p.a_float = 2.0
+        with p.params.batch():
+            p.an_int = 4
+            p.a_float = 3.0
+        # only the changes of an_int are held back:
+        assert emitted == [{"an_int": 2}, {"a_float": 2.0}, {"a_float": 3.0}]
+        QTest.qWait(3 * INTERVAL)
+        assert emitted[3:] == [{"an_int": 4}]
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 4
+
+    def testFlush(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+        p.set_signal_rate(1000 / INTERVAL, debounce=True)
+        p.an_int = 2
+        p.an_int = 3
+        p.flush_signal()
+        assert emitted == [{"an_int": 3}]
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 1
+
+    def testCollapsibleWidget(self):
+        built = []
+        deleted = []
+
+        def make_child():
+            child = QWidget()
+            child.destroyed.connect(lambda _, i=len(built): deleted.append(i))
+            built.append(child)
+            return child
+
+        lazy = CollapsibleWidget(name="lazy", make_child=make_child)
+        assert lazy.child_widget is None and built == []
+        lazy.toggle_collapse()
+        assert lazy.child_widget is built[0]
+        lazy.toggle_collapse()
+        assert lazy.child_widget is built[0]
+        assert lazy.child_widget.maximumHeight() == 0
+        lazy.toggle_collapse()
+        assert len(built) == 1
+
+        released = CollapsibleWidget(
+            name="released", make_child=make_child, release_hidden=True
+        )
+        released.toggle_collapse()
+        assert released.child_widget is built[1]
+        released.toggle_collapse()
+        assert released.child_widget is None
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        assert deleted == [1]
+        released.toggle_collapse()
+        assert released.child_widget is built[2]
+
+        # release_hidden has no effect on a child given directly
+        child = QWidget()
+        eager = CollapsibleWidget(child, name="eager", release_hidden=True)
+        eager.toggle_collapse()
+        eager.toggle_collapse()
+        assert eager.child_widget is child
+        assert deleted == [1]
+
+    def testSliderFrames(self):
+        p = SignalParametrized()
+        emitted = self.emissions(p)
+
+        # without frame_interval, every move sets the parameter once
+        widget = SliderWidgetWithNumbers(p, "a_float")
+        slider = widget.slider
+        slider.resize(200, 50)
+        slider.mouse_status = 1
+        slider.old_pos = p.a_float
+        slider.mouse_start_x, slider.mouse_start_y = 100, 20
+        for x in [101, 105, 110]:
+            slider.mouseMoveEvent(move_event(x, 20))
+        assert len(emitted) == 3
+        assert p.a_float == slider.pos > 1.0
+
+        emitted.clear()
+        widget = SliderWidgetWithNumbers(p, "a_float", frame_interval=INTERVAL)
+        slider = widget.slider
+        slider.resize(200, 50)
+        slider.mouse_status = 1
+        slider.old_pos = p.a_float
+        slider.mouse_start_x, slider.mouse_start_y = 100, 20
+        for x in [99, 95, 90]:
+            slider.mouseMoveEvent(move_event(x, 20))
+        assert emitted == []
+        QTest.qWait(3 * INTERVAL)
+        assert emitted == [{"a_float": slider.pos}]
+        # a move pending when the mouse is released is applied at once
+        slider.mouseMoveEvent(move_event(80, 20))
+        slider.mouseReleaseEvent(None)
+        assert len(emitted) == 2 and p.a_float == slider.pos
+        QTest.qWait(3 * INTERVAL)
+        assert len(emitted) == 2
+
+        emitted.clear()
+        widget = RangeSliderWidgetWithNumbers(p, "a_range", frame_interval=INTERVAL)
+        slider = widget.range_slider
+        slider.resize(200, 50)
+        slider.mouse_status = 3
+        slider.old_left, slider.old_right = p.a_range
+        slider.mouse_start_x, slider.mouse_start_y = 100, 20
+        for x in [101, 103, 107]:
+            slider.mouseMoveEvent(move_event(x, 20))
+        QTest.qWait(3 * INTERVAL)
+        # a single write, with both ends unrounded by the spin boxes
+        assert emitted == [{"a_range": (slider.left, slider.right)}]
+        assert p.a_range[0] > 0.2
+        assert widget.spin_left.value() == round(slider.left, 2)
+
+    def testTableModel(self):
+        p = TableParametrized()
+        model = ParameterTableModel(p)
+        rows = model.rows
+        assert model.rowCount() == len(rows) == 12
+        assert model.columnCount() == 2
+
+        def data(name, column=1, role=Qt.DisplayRole):
+            return model.data(model.index(rows[name], column), role)
+
+        assert data("a_float", 0) == "A float"
+        assert data("a_float") == "1.5 dB"
+        assert data("a_float", role=Qt.ToolTipRole) == "gain"
+        assert data("an_int") == "3"
+        assert data("a_list") == "a"
+        assert data("a_range") == "0.5, 1.5"
+        # tuples which are not all numbers are shown as well
+        assert data("str_pair") == "a, b"
+        assert data("open_range") == "1, None"
+
+        def editable(name, column=1):
+            flags = model.flags(model.index(rows[name], column))
+            return bool(flags & Qt.ItemIsEditable)
+
+        assert editable("a_float") and editable("a_range")
+        assert not editable("a_float", 0)
+        assert not editable("fixed") and not editable("str_pair")
+        assert model.flags(QModelIndex()) == Qt.NoItemFlags
+
+        changed = []
+        model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+        assert model.setData(model.index(rows["an_int"], 1), 5)
+        assert p.an_int == 5 and changed == [rows["an_int"]]
+        assert not model.setData(model.index(rows["an_int"], 1), 6, Qt.DisplayRole)
+        assert not model.setData(QModelIndex(), 6)
+        assert p.an_int == 5
+
+        # the table follows the changes signalled by the parametrized object
+        p = SignalParametrized()
+        model = ParameterTableModel(p)
+        changed = []
+        model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+        p.a_float = 2.0
+        assert changed == [model.rows["a_float"]]
+
+    def testTableEditors(self):
+        p = TableParametrized()
+        table = ParameterTableGui(p)
+        model = table.param_model
+        delegate = ParameterDelegate()
+        gui_types = set()
+        for name, row in model.rows.items():
+            index = model.index(row, 1)
+            if not model.flags(index) & Qt.ItemIsEditable:
+                continue
+            param = p.params[name]
+            editor = delegate.createEditor(table, QStyleOptionViewItem(), index)
+            assert type(editor) is gui_map[param.gui]
+            assert editor.parentWidget() is table
+            for label in ["label", "label_name"]:
+                if hasattr(editor, label):
+                    assert getattr(editor, label).isHidden()
+            delegate.setEditorData(editor, index)
+            gui_types.add(param.gui)
+        assert gui_types == set(gui_map.keys())
+
+        # the controls set the parameter, and the view is updated
+        editor = delegate.createEditor(
+            table, QStyleOptionViewItem(), model.index(model.rows["an_int"], 1)
+        )
+        editor.control.setValue(7)
+        assert p.an_int == 7
+        assert model.data(model.index(model.rows["an_int"], 1)) == "7"
+
+    def testTreeGui(self):
+        tree = ParameterTree()
+        GuiParametrized("a/p1", tree=tree)
+        GuiParametrized("a/p2", tree=tree)
+
+        gui = ParameterTreeGui(tree)
+        assert gui.paramtrized_widgets == {}
+        gui.collapsible_widgets["a/p2"].toggle_collapse()
+        assert list(gui.paramtrized_widgets.keys()) == ["a/p2"]
+        assert gui.paramtrized_widgets["a/p2"].parametrized is tree.tracked["a/p2"]
+
+        gui = ParameterTreeGui(tree, release_hidden=True)
+        gui.collapsible_widgets["a/p1"].toggle_collapse()
+        assert list(gui.paramtrized_widgets.keys()) == ["a/p1"]
+        gui.collapsible_widgets["a/p1"].toggle_collapse()
+        assert gui.paramtrized_widgets == {}
+
+        gui = ParameterTreeGui(tree, lazy=False)
+        assert list(gui.paramtrized_widgets.keys()) == ["a/p1", "a/p2"]
+
+    def refreshed(self, gui):
+        """ Record the names of the parameters whose widget is updated
+        """
+        refreshed = []
+        for name, widget in gui.param_widgets.items():
+            widget.update_display = partial(refreshed.append, name)
+        return refreshed
+
+    def testRefreshWidgets(self):
+        p = GuiParametrized()
+        gui = ParameterGui(p)
+        p.params.acknowledge_changes()
+        p.an_int = 5
+        p.a_bool = True
+        gui.refresh_widgets(["an_int"])
+        assert gui.param_widgets["an_int"].control.value() == 5
+        assert not gui.param_widgets["a_bool"].control.isChecked()
+        gui.refresh_widgets()
+        assert gui.param_widgets["a_bool"].control.isChecked()
+
+        refreshed = self.refreshed(gui)
+        gui.refresh_widgets(p.params.changed_values())
+        assert sorted(refreshed) == ["a_bool", "an_int"]
+
+        tree = ParameterTree()
+        p1 = GuiParametrized("a/p1", tree=tree)
+        GuiParametrized("a/p2", tree=tree)
+        gui = ParameterTreeGui(tree, lazy=False)
+        refreshed = {
+            name: self.refreshed(widget)
+            for name, widget in gui.paramtrized_widgets.items()
+        }
+        version = tree.version
+        p1.a_float = 2.0
+        gui.refresh_widgets(tree.serialize(since=version))
+        assert refreshed == {"a/p1": ["a_float"], "a/p2": []}
+        gui.refresh_widgets()
+        assert len(refreshed["a/p2"]) == 3
+
+        # only built widgets are updated
+        gui = ParameterTreeGui(tree)
+        gui.refresh_widgets(tree.serialize())
+        assert gui.paramtrized_widgets == {}
+
+    def testSignalRefresh(self):
+        p = SignalParametrized()
+        gui = ParameterGui(p)
+        spin = gui.param_widgets["an_int"].control
+        p.an_int = 7
+        assert spin.value() == 7
+
+        # changes made from the gui are notified without looping back
+        spin.setValue(9)
+        assert p.an_int == 9
+
+        refreshed = self.refreshed(gui)
+        p.a_float = 2.0
+        assert refreshed == ["a_float"]
+
+        # the widgets follow the rate limited signal
+        p.set_signal_rate(1000 / INTERVAL, debounce=True)
+        p.an_int = 3
+        p.an_int = 4
+        assert refreshed == ["a_float"]
+        QTest.qWait(3 * INTERVAL)
+        assert refreshed == ["a_float", "an_int"]
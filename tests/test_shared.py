@@ -0,0 +1,83 @@
+import json
+import sys
+import unittest
+import warnings
+from multiprocessing import get_context
+
+from lightparam import Parametrized, Param, ParameterTree
+
+if sys.version_info >= (3, 8):
+    from lightparam.shared import SharedTreeMirror, SharedTreeReader
+
+
+class MirroredParametrized(Parametrized):
+    def __init__(self, name, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1)
+        self.a_float = Param(1.0, (-1.0, 10.0))
+        self.a_bool = Param(False)
+        self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+        self.a_str = Param("strstr")
+
+
+def read_in_process(layout, queue):
+    reader = SharedTreeReader(layout)
+    queue.put(reader.values())
+    reader.close()
+
+
+@unittest.skipIf(sys.version_info < (3, 8), "shared_memory requires Python 3.8")
+class TestShared(unittest.TestCase):
+    def testMirror(self):
+        tree = ParameterTree()
+        p1 = MirroredParametrized("a/p1", tree=tree)
+        p2 = MirroredParametrized("b/p2", tree=tree)
+        mirror = SharedTreeMirror(tree)
+        reader = SharedTreeReader(mirror.layout)
+        try:
+            assert set(reader.keys()) == {
+                k for k in tree.serialize_flat().keys() if not k.endswith("a_str")
+            }
+            assert reader["a/p1/a_range"] == (0.5, 1.5)
+            assert reader["b/p2/a_bool"] is False
+
+            version = reader.version
+            p1.a_float = 2.5
+            p2.a_bool = True
+            p1.a_str = "not mirrored"
+            assert reader.version == version + 2
+            assert reader["a/p1/a_float"] == 2.5
+            assert reader.changed_values(version) == {
+                "a/p1/a_float": 2.5,
+                "b/p2/a_bool": True,
+            }
+
+            queue = get_context("spawn").Queue()
+            process = get_context("spawn").Process(
+                target=read_in_process, args=(mirror.layout, queue)
+            )
+            process.start()
+            values = queue.get(timeout=30)
+            process.join()
+            assert values == reader.values()
+            assert values["a/p1/an_int"] == 1
+
+            # ranges read back from JSON as lists
+            tree.deserialize(json.loads(json.dumps(tree.serialize())))
+            p1.a_range = [0.25, 0.75]
+            assert reader["a/p1/a_range"] == (0.25, 0.75)
+
+            # values which do not fit the layout are not truncated
+            version = reader.version
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                p1.an_int = 2.7
+            assert len(caught) == 1
+            assert p1.an_int == 2.7
+            assert reader["a/p1/an_int"] is None
+            assert reader.changed_values(version) == {"a/p1/an_int": None}
+            p1.an_int = 3
+            assert reader["a/p1/an_int"] == 3
+        finally:
+            reader.close()
+            mirror.close()
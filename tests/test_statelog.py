@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from lightparam import Parametrized, Param, ParameterTree
+from lightparam.statelog import StateLogWriter, StateLogReader, index_path
+
+
+class LoggedParametrized(Parametrized):
+    def __init__(self, name, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1)
+        self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+
+
+class TestStateLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "log.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testStateAt(self):
+        tree = ParameterTree()
+        p1 = LoggedParametrized("a/p1", tree=tree)
+        p2 = LoggedParametrized("b/p2", tree=tree)
+        writer = StateLogWriter(tree, self.path, checkpoint_every=7)
+        for i in range(50):
+            p1.an_int = i
+            p2.a_range = (0.0, i / 50)
+        writer.close()
+
+        reader = StateLogReader(self.path)
+        assert len(reader.checkpoint_times) == 1 + 100 // 7
+
+        # replay the whole log to check the state at each change
+        records = list(reader.records())
+        state = dict(records[0]["state"])
+        assert state == {
+            "a/p1/an_int": 1,
+            "a/p1/a_range": [0.5, 1.5],
+            "b/p2/an_int": 1,
+            "b/p2/a_range": [0.5, 1.5],
+        }
+        for i, record in enumerate(records[1:]):
+            if "key" not in record:
+                continue
+            state[record["key"]] = record["value"]
+            following = records[i + 2] if i + 2 < len(records) else None
+            if following is None or following["t"] > record["t"]:
+                assert reader.state_at(record["t"]) == state
+
+        assert reader.final_state() == {
+            "a/p1/an_int": 49,
+            "a/p1/a_range": [0.5, 1.5],
+            "b/p2/an_int": 1,
+            "b/p2/a_range": [0.0, 49 / 50],
+        }
+        with self.assertRaises(ValueError):
+            reader.state_at(records[0]["t"] - 1)
+
+        # without the index, the checkpoints are found by reading the log
+        os.remove(index_path(self.path))
+        scanned = StateLogReader(self.path)
+        assert scanned.checkpoint_offsets == reader.checkpoint_offsets
+
+    def testUnencodable(self):
+        tree = ParameterTree()
+        p1 = LoggedParametrized("a/p1", tree=tree)
+        p1.a_folder = Param(Path("data"), gui="folder")
+        writer = StateLogWriter(tree, self.path)
+        p1.an_int = 2
+        p1.a_folder = Path("other")
+        p1.a_range = object()
+        p1.an_int = 3
+        p1.a_range = (0.0, 1.0)
+        with self.assertRaises(TypeError):
+            writer.close()
+
+        assert StateLogReader(self.path).final_state() == {
+            "a/p1/an_int": 3,
+            "a/p1/a_range": [0.0, 1.0],
+            "a/p1/a_folder": "other",
+        }
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+
+from lightparam import Parametrized, Param, ParameterTree, ValidationError
+from lightparam.sweep import SweepTable, product_columns
+
+
+class SweptParametrized(Parametrized):
+    def __init__(self, name, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.an_int = Param(1)
+        self.a_float = Param(1.0, (-1.0, 10.0))
+        self.a_list = Param("a", ["a", "b", "c"])
+        self.a_bool = Param(False)
+        self.a_range = Param((0.5, 1.5), (0.0, 2.0))
+        self.an_int_range = Param((1, 3), (0, 10))
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sweep.lps")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testApplyRows(self):
+        tree = ParameterTree()
+        p1 = SweptParametrized("a/p1", tree=tree)
+        p2 = SweptParametrized("b/p2", tree=tree)
+        grid = {
+            "a/p1/an_int": [1, 2, 3],
+            "a/p1/a_list": ["b", "c"],
+            "a/p1/a_bool": [True, False],
+            "b/p2/a_float": [0.5, 2.5],
+            "b/p2/a_range": [(0.0, 1.0), (1.0, 2.0)],
+            "b/p2/an_int_range": [(2, 5)],
+        }
+        columns = product_columns(grid)
+        SweepTable.write(self.path, tree, columns)
+
+        table = SweepTable(self.path)
+        assert len(table) == 3 * 2 ** 4
+        assert list(table.column("a/p1/an_int")[:3]) == [1, 1, 1]
+        for i in range(len(table)):
+            table.apply_row(tree, i)
+            row = {key: column[i] for key, column in columns.items()}
+            assert table.row(i) == row
+            assert p1.an_int == row["a/p1/an_int"]
+            assert p1.a_list == row["a/p1/a_list"]
+            assert p1.a_bool is row["a/p1/a_bool"]
+            assert p2.a_range == row["b/p2/a_range"]
+            assert p2.a_float == row["b/p2/a_float"]
+            assert p2.an_int_range == (2, 5)
+            assert all(isinstance(v, int) for v in p2.an_int_range)
+        assert table.row(-1) == table.row(len(table) - 1)
+        with self.assertRaises(IndexError):
+            table.row(len(table))
+        table.close()
+
+        with self.assertRaises(ValueError):
+            SweepTable.write(
+                self.path, tree, {"a/p1/an_int": [1, 2], "a/p1/a_float": [1.0]}
+            )
+
+    def testColumnValues(self):
+        tree = ParameterTree()
+        p1 = SweptParametrized("a/p1", tree=tree)
+        p1.a_pair = Param(("a", "b"))
+        columns = {
+            "a/p1/an_int": [1, 2.0],
+            "a/p1/a_float": [1, 2.5],
+            "a/p1/a_pair": [("c", "d"), ["c", "d"]],
+            "a/p1/an_int_range": [(1, 2), [3.0, 4]],
+        }
+        SweepTable.write(self.path, tree, columns)
+        table = SweepTable(self.path)
+        assert table.row(0) == {
+            "a/p1/an_int": 1,
+            "a/p1/a_float": 1.0,
+            "a/p1/a_pair": ("c", "d"),
+            "a/p1/an_int_range": (1, 2),
+        }
+        assert table.row(1)["a/p1/a_pair"] == ["c", "d"]
+        assert isinstance(table.row(1)["a/p1/an_int"], int)
+        table.apply_row(tree, 0)
+        assert p1.a_pair == ("c", "d")
+        table.close()
+
+        for key, values, i_row in [
+            ("a/p1/an_int", [1, 1.5], 1),
+            ("a/p1/an_int", [2 ** 64], 0),
+            ("a/p1/a_bool", [True, 1], 1),
+            ("a/p1/a_float", ["x"], 0),
+            ("a/p1/a_range", [(0.0, 1.0), (0.0,)], 1),
+            ("a/p1/an_int_range", [(1, 2.5)], 0),
+            ("a/p1/a_list", ["a", object()], 1),
+        ]:
+            with self.assertRaises(ValueError) as raised:
+                SweepTable.write(self.path, tree, {key: values})
+            message = str(raised.exception)
+            assert key in message and f"Row {i_row} " in message
+
+    def testValidate(self):
+        tree = ParameterTree()
+        SweptParametrized("a/p1", tree=tree)
+        columns = {
+            "a/p1/a_float": [0.0, 5.0, 20.0, -3.0],
+            "a/p1/a_list": ["a", "b", "z", "a"],
+            "a/p1/a_range": [(0.0, 1.0), (1.5, 1.0), (0.0, 2.0), (0.0, 3.0)],
+            "a/p1/an_int": [1, 2, 3, 4],
+            "a/p1/an_int_range": [(1, 3), (0, 11), (5, 4), (2, 2)],
+        }
+        SweepTable.write(self.path, tree, columns)
+        table = SweepTable(self.path)
+        with self.assertRaises(ValidationError) as raised:
+            table.validate(tree)
+        assert sorted(v[0] for v in raised.exception.violations) == [
+            "a/p1/a_float[2]",
+            "a/p1/a_float[3]",
+            "a/p1/a_list[2]",
+            "a/p1/a_range[1]",
+            "a/p1/a_range[3]",
+            "a/p1/an_int_range[1]",
+            "a/p1/an_int_range[2]",
+        ]
+        table.close()
+
+        columns = product_columns({"a/p1/a_float": [0.0, 10.0], "a/p1/a_list": ["c"]})
+        SweepTable.write(self.path, tree, columns)
+        table = SweepTable(self.path)
+        table.validate(tree)
+        table.close()